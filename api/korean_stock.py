@@ -1,54 +1,80 @@
 from http.server import BaseHTTPRequestHandler
 import urllib
-import requests
-from bs4 import BeautifulSoup
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import http_get
+from metrics import instrument, render_metrics, track_request
+from stock_index import STOCK_INDEX
+import naver_scrape
+
+STOCK_INDEX.load()
+
+def search_stock_code(query):
+    """로컬 종목 인덱스(정확히 일치) 우선, 없으면 m.stock.naver.com 검색 후 인덱스에 추가"""
+    code, name = STOCK_INDEX.resolve(query, guess=False)
+    if code:
+        return code, name
+    code, name = fetch_naver_stock_code(query)
+    if code:
+        STOCK_INDEX.learn(code, name)
+    return code, name
+
+@instrument("naver_search", error_of=lambda r: None if r[0] else "not found")
+def fetch_naver_stock_code(query):
+    r = http_get("https://m.stock.naver.com/api/search/searchList", params={"keyword": query})
+    js = r.json()
+    stock = next((item for item in js.get("stockList", []) if item.get("stockName") == query), None)
+    if not stock:
+        return None, None
+    return stock["itemCode"], stock["stockName"]
+
+@instrument("naver_stock")
+def fetch_stock_quote(code):
+    """네이버 금융 종목 페이지 → (현재가, 등락률, 부호, 거래량) 또는 None"""
+    r = http_get(f"https://finance.naver.com/item/main.nhn?code={code}")
+    return naver_scrape.parse_stock_quote(r.content)
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("query", [""])[0]
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        if "metrics" in params:
+            # 이 인스턴스에서 쌓인 지표 (Prometheus 텍스트 형식)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(render_metrics().encode("utf-8"))
+            return
+        query = params.get("query", [""])[0]
         if not query:
             self.send_response(400)
             self.end_headers()
-            self.wfile.write(b"query 파라미터 필요")
+            self.wfile.write("query 파라미터 필요".encode("utf-8"))
             return
 
-        try:
-            search_url = f"https://m.stock.naver.com/api/search/searchList?keyword={query}"
-            r = requests.get(search_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-            js = r.json()
-            stock = next((item for item in js.get("stockList", []) if item.get("stockName") == query), None)
-            if not stock:
-                result = f"{query}: 종목코드 조회 실패"
-            else:
-                code = stock["itemCode"]
-                name = stock["stockName"]
-
-                # 시세 크롤링
-                detail_url = f"https://finance.naver.com/item/main.nhn?code={code}"
-                r = requests.get(detail_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-                soup = BeautifulSoup(r.text, "html.parser")
-                price_tag = soup.select_one("p.no_today span.blind")
-                change_tag = soup.select_one("p.no_exday span.blind")
-                change_sign_tag = soup.select_one("p.no_exday span:nth-of-type(2)")
-                volume_tag = soup.select("td.first span.blind")
-
-                if not price_tag or not change_tag or not volume_tag:
-                    result = f"{name}: 시세 정보 없음"
-                else:
-                    price = int(price_tag.text.replace(",", ""))
-                    change = float(change_tag.text.replace(",", ""))
-                    sign = "+" if "up" in change_sign_tag.get("class", []) else "-"
-                    volume = int(volume_tag[1].text.replace(",", "")) if len(volume_tag) > 1 else 0
-
-                    result = (
-                        f"[{name}] 주식 시세\n"
-                        f"💰 현재 가격 → ₩{price:,} ({sign}{abs(change):.2f}%)\n"
-                        f"📊 거래량 → {volume:,}주"
-                    )
-        except Exception as e:
-            result = f"크롤링 오류: {e}"
+        with track_request("kr_stock", query):
+            result = self.lookup(query)
 
         self.send_response(200)
         self.end_headers()
         self.wfile.write(result.encode("utf-8"))
+
+    def lookup(self, query):
+        try:
+            code, name = search_stock_code(query)
+            if not code:
+                return f"{query}: 종목코드 조회 실패"
+            # 시세 크롤링
+            quote = fetch_stock_quote(code)
+            if not quote:
+                return f"{name}: 시세 정보 없음"
+            price, change, sign, volume = quote
+            return (
+                f"[{name}] 주식 시세\n"
+                f"💰 현재 가격 → ₩{price:,} ({sign}{abs(change):.2f}%)\n"
+                f"📊 거래량 → {volume:,}주"
+            )
+        except Exception as e:
+            return f"크롤링 오류: {e}"
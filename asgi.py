@@ -0,0 +1,117 @@
+"""
+ASGI 서버 모드
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/webhook 은 이벤트 루프에서 직접 받아 전용 스레드 풀에서 처리하고,
+처리 중/대기 중인 요청이 한도를 넘으면 바로 "잠시 후 다시 시도" 응답을 돌려준다.
+그 밖의 경로는 기존 Flask 앱으로 넘긴다.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi
+
+from main import app as flask_app, handle_webhook, kakao_text
+from metrics import REGISTRY
+
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "16"))
+WEBHOOK_QUEUE = int(os.environ.get("WEBHOOK_QUEUE", "64"))
+# 처리 슬롯을 이 시간(초) 안에 얻지 못하면 포기
+WEBHOOK_QUEUE_TIMEOUT = float(os.environ.get("WEBHOOK_QUEUE_TIMEOUT", "2.0"))
+
+SHED_TEXT = "요청이 많아 응답이 지연되고 있습니다. 잠시 후 다시 시도해 주세요."
+
+# 시세 조회용 fetch 풀과 분리해, 핸들러가 fetch 풀을 기다리다 서로 막히지 않게 한다
+WEBHOOK_EXECUTOR = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="webhook")
+
+class Overloaded(Exception):
+    pass
+
+class Admission:
+    """동시 처리 WEBHOOK_WORKERS개 + 대기열 WEBHOOK_QUEUE개, 넘치면 Overloaded"""
+
+    def __init__(self, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE, queue_timeout=WEBHOOK_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.shed = 0
+        self._slots = None
+
+    async def run(self, func, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self.waiting >= self.queue_size:
+            self.shed += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise Overloaded()
+        finally:
+            self.waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(WEBHOOK_EXECUTOR, func, *args)
+        finally:
+            self._slots.release()
+
+ADMISSION = Admission()
+
+REGISTRY.add_collector(lambda: [
+    ("chatbot_webhook_shed_total", "counter", "Webhook requests shed by admission control", [({}, ADMISSION.shed)]),
+    ("chatbot_webhook_waiting", "gauge", "Webhook requests waiting for a worker slot", [({}, ADMISSION.waiting)]),
+])
+FLASK_ASGI = WsgiToAsgi(flask_app)
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def webhook(scope, receive, send):
+    try:
+        req = json.loads(await read_body(receive) or b"{}")
+    except ValueError:
+        await send_json(send, {"error": "invalid json"}, status=400)
+        return
+    try:
+        payload = await ADMISSION.run(handle_webhook, req)
+    except Overloaded:
+        payload = kakao_text(SHED_TEXT)
+    await send_json(send, payload)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/webhook" and scope["method"] == "POST":
+        await webhook(scope, receive, send)
+    else:
+        await FLASK_ASGI(scope, receive, send)
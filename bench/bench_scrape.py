@@ -0,0 +1,86 @@
+"""
+네이버 금융 페이지 파싱 벤치마크: 기존 BeautifulSoup(r.text, "html.parser") 경로 vs naver_scrape(lxml)
+
+    python bench/bench_scrape.py [-n 200]
+
+bench/fixtures 의 저장된 페이지를 읽어 같은 결과가 나오는지 확인한 뒤, 페이지별 평균 파싱 시간을 비교한다.
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import naver_scrape
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+def bs4_stock_quote(content):
+    soup = BeautifulSoup(content.decode(naver_scrape.NAVER_ENCODING), "html.parser")
+    price_tag = soup.select_one("p.no_today span.blind")
+    change_tag = soup.select_one("p.no_exday span.blind")
+    change_sign_tag = soup.select_one("p.no_exday span:nth-of-type(2)")
+    volume_tag = soup.select("td.first span.blind")
+    if not price_tag or not change_tag or not volume_tag:
+        return None
+    price = int(price_tag.text.replace(",", ""))
+    change = float(change_tag.text.replace(",", ""))
+    sign = "+" if "up" in change_sign_tag.get("class", []) else "-"
+    volume = int(volume_tag[1].text.replace(",", "")) if len(volume_tag) > 1 else 0
+    return price, change, sign, volume
+
+def bs4_ranking(content):
+    soup = BeautifulSoup(content.decode(naver_scrape.NAVER_ENCODING), "html.parser")
+    results = []
+    for row in soup.select("table.type_2 tr")[2:]:
+        cols = row.select("td")
+        if len(cols) < 6:
+            continue
+        code_tag = cols[1].select_one("a")
+        code = code_tag["href"].split("code=")[-1] if code_tag else "Unknown"
+        results.append((cols[1].text.strip(), code, cols[5].text.strip()))
+        if len(results) >= 20:
+            break
+    return results
+
+def bs4_search_link(content):
+    soup = BeautifulSoup(content.decode(naver_scrape.NAVER_ENCODING), "html.parser")
+    link = soup.select_one("a[href*='/item/main.nhn?code=']")
+    if not link:
+        return None, None
+    return link["href"].split("code=")[-1], link.text.strip()
+
+CASES = [
+    ("종목 시세", "naver_item_005930.html", bs4_stock_quote, naver_scrape.parse_stock_quote),
+    ("상승률 순위", "naver_sise_rise.html", bs4_ranking, naver_scrape.parse_ranking),
+    ("종목 검색", "naver_search_samsung.html", bs4_search_link, naver_scrape.parse_search_link),
+]
+
+def timeit(func, content, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func(content)
+    return (time.perf_counter() - start) / n * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="네이버 금융 파싱 벤치마크")
+    parser.add_argument("-n", type=int, default=200, help="페이지당 반복 횟수")
+    args = parser.parse_args()
+
+    print(f"{'페이지':<10} {'크기':>8} {'bs4(ms)':>9} {'lxml(ms)':>9} {'배율':>6}")
+    for label, fixture, old, new in CASES:
+        with open(os.path.join(FIXTURES, fixture), "rb") as f:
+            content = f.read()
+        expected, actual = old(content), new(content)
+        if expected != actual:
+            print(f"{label}: 결과 불일치\n  bs4 : {expected}\n  lxml: {actual}")
+            sys.exit(1)
+        old_ms = timeit(old, content, args.n)
+        new_ms = timeit(new, content, args.n)
+        print(f"{label:<10} {len(content) // 1024:>6}KB {old_ms:>9.3f} {new_ms:>9.3f} {old_ms / new_ms:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+카카오 callbackUrl 대역 서버 (표준 라이브러리만 사용)
+
+    python bench/callback_receiver.py --port 8790
+
+받은 POST 본문을 출력하고, GET /received 로 지금까지 받은 목록을 JSON으로 돌려준다.
+webhook 요청의 userRequest.callbackUrl 에 http://127.0.0.1:8790/cb/<id> 를 넣어 오프라인으로 콜백 흐름을 확인할 수 있다.
+
+    python bench/callback_receiver.py --check
+
+--check: 업스트림 대역 서버(stub_server)와 이 수신 서버를 띄우고 main.handle_webhook 에 같은 느린 발화를
+callbackUrl만 바꿔 여러 번 넣어, 즉시 응답(useCallback), 조회 1회로 합쳐지는지(deduped), 콜백 POST 본문을 확인한다.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class CallbackReceiver(BaseHTTPRequestHandler):
+    received = []
+    lock = threading.Lock()
+    status = 200
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = body.decode("utf-8", errors="replace")
+        with self.lock:
+            self.received.append({"path": self.path, "at": time.time(), "payload": payload})
+        print(f"{self.path} <- {json.dumps(payload, ensure_ascii=False)[:300]}")
+        self.reply({"taskId": self.path.rsplit("/", 1)[-1], "status": "SUCCESS"}, self.status)
+
+    def do_GET(self):
+        with self.lock:
+            self.reply(list(self.received))
+
+    def reply(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(host="127.0.0.1", port=8790, status=200):
+    handler = type("Handler", (CallbackReceiver,), {"received": [], "lock": threading.Lock(), "status": status})
+    return ThreadingHTTPServer((host, port), handler)
+
+def check(utter="!BTC", repeat=3, timeout=10.0):
+    """같은 발화 repeat번 → 조회 1회, 콜백 POST repeat번. 모두 맞으면 True"""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from stub_server import make_server as make_stub
+
+    # 첫 요청이 끝나기 전에 나머지가 들어오도록 업스트림 응답을 조금 늦춘다
+    stub = make_stub(port=0, latency=200)
+    receiver = make_server(port=0)
+    for server in (stub, receiver):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    # main 을 import 하기 전에 환경을 맞춘다
+    os.environ["UPSTREAM_OVERRIDE"] = f"*=http://127.0.0.1:{stub.server_address[1]}/{{host}}"
+    os.environ["KRX_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-krx-"), "krx_stocks.tsv")
+    os.environ["QUOTE_HISTORY_DIR"] = tempfile.mkdtemp(prefix="bench-history-")
+    os.environ["WARMUP"] = "0"
+    os.environ.pop("TICKER_STREAM", None)
+    import main
+
+    computed = []
+    dispatch = main.CALLBACKS.dispatch
+
+    def counting_dispatch(text):
+        computed.append(text)
+        return dispatch(text)
+
+    main.CALLBACKS.dispatch = counting_dispatch
+    base = f"http://127.0.0.1:{receiver.server_address[1]}/cb"
+    acks = [main.handle_webhook({"userRequest": {"utterance": utter, "callbackUrl": f"{base}/{i}"}})
+            for i in range(repeat)]
+
+    received = receiver.RequestHandlerClass.received
+    deadline = time.monotonic() + timeout
+    while len(received) < repeat and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.2)  # 중복 POST가 더 오지 않는지
+    stats = main.CALLBACKS.stats()
+    stub.shutdown()
+    receiver.shutdown()
+
+    texts = [item["payload"]["template"]["outputs"][0]["simpleText"]["text"]
+             for item in received if isinstance(item["payload"], dict) and "template" in item["payload"]]
+    results = [
+        ("즉시 응답 useCallback", all(a.get("useCallback") is True for a in acks)),
+        (f"조회 1회 (실제 {len(computed)}회)", len(computed) == 1),
+        (f"deduped {repeat - 1} (실제 {stats['deduped']})", stats["deduped"] == repeat - 1),
+        (f"콜백 POST {repeat}건 (실제 {len(received)}건)", len(received) == repeat),
+        ("콜백 경로마다 한 번씩", sorted(item["path"] for item in received) == sorted(f"/cb/{i}" for i in range(repeat))),
+        ("같은 본문", len(texts) == repeat and len(set(texts)) == 1),
+        ("시세 응답", bool(texts) and texts[0].startswith(f"[{utter[1:].upper()}]")),
+        (f"POST 실패 0 (실제 {stats['post_errors']})", stats["post_errors"] == 0),
+    ]
+    for name, ok in results:
+        print(f"{'ok' if ok else 'FAIL':4} {name}")
+    if texts:
+        print(texts[0][:200])
+    return all(ok for _, ok in results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="카카오 콜백 수신 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--status", type=int, default=200, help="콜백에 돌려줄 HTTP 상태 코드")
+    parser.add_argument("--check", action="store_true", help="main.handle_webhook 콜백 흐름을 확인하고 종료")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check() else 1)
+    server = make_server(args.host, args.port, args.status)
+    print(f"listening on http://{args.host}:{args.port}")
+    server.serve_forever()
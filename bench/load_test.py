@@ -0,0 +1,279 @@
+"""
+/webhook 부하 테스트 (업스트림은 bench/stub_server.py 대역 서버로 대체)
+
+    python bench/load_test.py --concurrency 1,8,32 --requests 400 --latency 30 --jitter 10
+    python bench/load_test.py --json bench/results/after.json --baseline bench/results/before.json
+
+대역 서버를 같은 프로세스에 띄우고 UPSTREAM_OVERRIDE로 모든 업스트림 호출을 그쪽으로 돌린 뒤
+main.app 을 Flask 테스트 클라이언트로 호출한다. --url 을 주면 이미 떠 있는 서버(uvicorn asgi:app 등)를
+HTTP로 호출한다 (이 경우 대역 서버는 서버 쪽 UPSTREAM_OVERRIDE에 맞춰 따로 띄운다).
+
+동시성 단계마다 시세 캐시를 비우고, 같은 --seed 면 같은 발화 순서/같은 지연이 나오므로 실행 간 비교가 가능하다.
+/지수 와 '#A,B' 여러 종목 조회는 yf.download 가 자체 세션을 써서 대역 서버로 돌릴 수 없어 기본 구성에서 뺐다.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import make_server, parse_host_latency
+
+# (발화, 비중) : 실제 대화 로그의 명령어 비율을 대략 따른 기본 구성
+DEFAULT_MIX = [
+    ("!BTC", 20),
+    ("!비트코인", 10),
+    ("!ETH", 8),
+    ("!XRP", 6),
+    ("!BTC,ETH,SOL", 6),
+    ("@삼성전자", 12),
+    ("@삼전", 6),
+    ("#AAPL", 8),
+    ("#TSLA", 5),
+    ("/한국주식 상승률", 6),
+    ("/미국주식 하락률", 4),
+    ("/명령어", 3),
+    ("/없는명령", 2),
+]
+
+def parse_mix(spec):
+    """"!BTC=20,@삼성전자=10" → [(발화, 비중)]"""
+    mix = []
+    for item in spec.split(","):
+        utter, _, weight = item.rpartition("=")
+        mix.append((utter, float(weight)))
+    return mix
+
+def utterance_sequence(mix, count, seed):
+    rng = random.Random(seed)
+    utters = [u for u, _ in mix]
+    weights = [w for _, w in mix]
+    return rng.choices(utters, weights=weights, k=count)
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+class InProcessClient:
+    def __init__(self):
+        import main
+        # 백그라운드 워밍업(모듈 미리 불러오기 등)이 측정에 섞이지 않게 바로 풀고 끝날 때까지 기다린다
+        main.STARTUP.settle()
+        main.STARTUP.wait(30)
+        self.main = main
+        self.client = main.app.test_client()
+
+    def post(self, utter):
+        r = self.client.post("/webhook", json={"userRequest": {"utterance": utter}})
+        return r.status_code, r.get_json()
+
+    def handle(self, utter):
+        """Flask 요청 객체 없이 웹훅 처리 함수만 호출 (할당 측정용)"""
+        return self.main.handle_webhook({"userRequest": {"utterance": utter}})
+
+    def reset(self):
+        self.main.QUOTE_CACHE.clear()
+
+class HttpClient:
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip("/") + "/webhook"
+        self.local = threading.local()
+        self.requests = requests
+
+    def post(self, utter):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        r = session.post(self.url, json={"userRequest": {"utterance": utter}}, timeout=30)
+        return r.status_code, r.json()
+
+    def reset(self):
+        pass
+
+def reply_text(payload):
+    try:
+        return payload["template"]["outputs"][0]["simpleText"]["text"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+def run_level(client, utters, concurrency):
+    """발화 목록을 concurrency개 스레드로 나눠 보내고 (전체 소요, [(발화, 지연, 성공)]) 반환"""
+    results = [None] * len(utters)
+
+    def send(i):
+        utter = utters[i]
+        start = time.perf_counter()
+        try:
+            status, payload = client.post(utter)
+            ok = status == 200 and bool(reply_text(payload))
+        except Exception as e:
+            print(f"Load Test Request Error {utter}: {e}")
+            ok = False
+        results[i] = (utter, time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(len(utters))))
+    return time.perf_counter() - start, results
+
+def measure_allocations(client, mix, repeat):
+    """
+    발화별로 요청 1건 처리 중 늘어난 메모리 최대치(KiB)와 할당 블록 수 (단일 스레드, 캐시 채운 상태).
+    Flask/Werkzeug 요청 객체 생성(약 70KiB)이 핸들러 차이를 가리지 않도록 main.handle_webhook 만 잰다
+    """
+    allocations = {}
+    tracemalloc.start()
+    try:
+        for utter, _ in mix:
+            client.handle(utter)  # 캐시/지연 로딩 채우기
+            peaks = []
+            blocks = []
+            for _ in range(repeat):
+                before = tracemalloc.take_snapshot()
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                client.handle(utter)
+                _, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                peaks.append(peak - base)
+                blocks.append(sum(max(0, s.count_diff) for s in after.compare_to(before, "filename")))
+            allocations[utter] = {
+                "peak_kib": round(sorted(peaks)[len(peaks) // 2] / 1024, 1),
+                "retained_blocks": sorted(blocks)[len(blocks) // 2],
+            }
+    finally:
+        tracemalloc.stop()
+    return allocations
+
+def compare(report, baseline):
+    """단계별 p50/p95/p99/처리량을 기준 결과와 비교한 표"""
+    lines = ["", "baseline 비교 (음수 지연 / 양수 처리량이 개선)"]
+    base_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            old, new = base[key], level[key]
+            change = (new - old) / old * 100 if old else 0.0
+            deltas.append(f"{key} {old:>8.2f} → {new:>8.2f} ({change:+6.1f}%)")
+        lines.append(f"c={level['concurrency']:<3} " + " | ".join(deltas))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="/webhook 부하 테스트")
+    parser.add_argument("--concurrency", default="1,8,32", help="동시성 단계 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=300, help="단계별 요청 수")
+    parser.add_argument("--warmup", type=int, default=30, help="단계 시작 전 버리는 요청 수")
+    parser.add_argument("--mix", help="발화 구성: '!BTC=20,@삼성전자=10'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=30.0, help="대역 서버 응답 지연 평균(ms)")
+    parser.add_argument("--jitter", type=float, default=10.0)
+    parser.add_argument("--host-latency", action="append", help="호스트별 지연: api.upbit.com=30:10")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-port", type=int, default=0, help="0이면 빈 포트")
+    parser.add_argument("--no-cache", action="store_true", help="시세 캐시 TTL을 0으로 (업스트림 경로만 측정)")
+    parser.add_argument("--alloc-repeat", type=int, default=5, help="발화별 할당 측정 반복 (0이면 생략)")
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소 (지정하면 HTTP로 호출)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    stub = make_server("127.0.0.1", args.stub_port, args.latency, args.jitter,
+                       parse_host_latency(args.host_latency), args.error_rate, seed=args.seed)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    if args.url:
+        client = HttpClient(args.url)
+    else:
+        # main 을 import 하기 전에 환경을 맞춘다 (모듈 로딩 시점에 읽는 설정들)
+        os.environ["UPSTREAM_OVERRIDE"] = f"*={stub_url}/{{host}}"
+        os.environ["KRX_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-krx-"), "krx_stocks.tsv")
+        # 대역 서버의 녹화 시세가 실제 시세 기록(data/history)에 섞이지 않게
+        os.environ["QUOTE_HISTORY_DIR"] = tempfile.mkdtemp(prefix="bench-history-")
+        os.environ.pop("TICKER_STREAM", None)
+        if args.no_cache:
+            os.environ["QUOTE_CACHE_TTL"] = ",".join(f"{s}=0" for s in
+                                                     ("cmc", "upbit", "bithumb", "fx", "naver_stock", "naver_search", "yahoo"))
+        client = InProcessClient()
+
+    report = {
+        "config": {"mix": mix, "requests": args.requests, "warmup": args.warmup, "seed": args.seed,
+                   "latency_ms": args.latency, "jitter_ms": args.jitter, "error_rate": args.error_rate,
+                   "no_cache": args.no_cache, "target": args.url or "in-process"},
+        "levels": [],
+    }
+    print(f"stub {stub_url}  mix {len(mix)}종  요청 {args.requests}/단계  seed {args.seed}")
+    print(f"{'c':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'fail':>5}")
+
+    for concurrency in levels:
+        client.reset()
+        warm = utterance_sequence(mix, args.warmup, args.seed - 1)
+        run_level(client, warm, concurrency)
+
+        utters = utterance_sequence(mix, args.requests, args.seed)
+        elapsed, results = run_level(client, utters, concurrency)
+        by_utter = {}
+        for utter, latency, _ in results:
+            by_utter.setdefault(utter, []).append(latency)
+        level = {
+            "concurrency": concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(len(results) / elapsed, 2),
+            "failures": sum(1 for _, _, ok in results if not ok),
+            **summarize([latency for _, latency, _ in results]),
+            "utterances": {utter: summarize(latencies) for utter, latencies in by_utter.items()},
+        }
+        report["levels"].append(level)
+        print(f"{concurrency:>4} {level['rps']:>8.1f} {level['p50_ms']:>8.2f} {level['p95_ms']:>8.2f} "
+              f"{level['p99_ms']:>8.2f} {level['max_ms']:>8.2f} {level['failures']:>5}")
+
+    last = report["levels"][-1]
+    print(f"\n발화별 지연 (c={last['concurrency']})")
+    for utter, stats in sorted(last["utterances"].items(), key=lambda kv: -kv[1]["p95_ms"]):
+        print(f"  {utter:<16} n={stats['count']:<4} p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f}")
+
+    if args.alloc_repeat and not args.url:
+        report["allocations"] = measure_allocations(client, mix, args.alloc_repeat)
+        print("\n요청당 메모리 (tracemalloc, handle_webhook 만, 중앙값)")
+        for utter, alloc in report["allocations"].items():
+            print(f"  {utter:<16} peak {alloc['peak_kib']:>8.1f} KiB  남은 블록 {alloc['retained_blocks']:>6}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print(compare(report, json.load(f)))
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n저장: {args.json}")
+    stub.shutdown()
+
+if __name__ == "__main__":
+    main()
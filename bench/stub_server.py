@@ -0,0 +1,215 @@
+"""
+업스트림(업비트/빗썸/CMC/네이버/야후) 녹화 응답을 재생하는 로컬 대역 서버 (표준 라이브러리만 사용)
+
+    python bench/stub_server.py --port 8800 --latency 30 --jitter 10 --error-rate 0.02
+    UPSTREAM_OVERRIDE="*=http://127.0.0.1:8800/{host}" python main.py
+
+경로 첫 부분이 원래 호스트다 (예: /api.upbit.com/v1/ticker?markets=KRW-BTC).
+응답은 bench/fixtures 의 녹화 파일에서 요청한 심볼만 골라 돌려준다.
+지연/에러는 --seed 와 (경로, 순번)으로 정해지므로 같은 요청 순서면 매번 같은 값이 나온다.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        data = f.read()
+    return json.loads(data) if name.endswith(".json") else data
+
+class Fixtures:
+    """녹화 응답을 한 번만 읽어 둔다"""
+
+    def __init__(self):
+        self.upbit_markets = load_fixture("upbit_market_all.json")
+        self.upbit_tickers = {t["market"]: t for t in load_fixture("upbit_ticker.json")}
+        self.bithumb = load_fixture("bithumb_all_krw.json")
+        self.cmc = load_fixture("cmc_quotes_latest.json")
+        self.fx = load_fixture("naver_fx.json")
+        self.er_api = load_fixture("er_api_latest_usd.json")
+        self.yahoo_chart = load_fixture("yahoo_chart_meta.json")
+        self.yahoo_screener = load_fixture("yahoo_screener.json")
+        self.naver_m_search = load_fixture("naver_m_search.json")
+        self.naver_item = load_fixture("naver_item_005930.html")
+        self.naver_sise = load_fixture("naver_sise_rise.html")
+        self.naver_search = load_fixture("naver_search_samsung.html")
+
+def first(query, name, default=""):
+    return query.get(name, [default])[0]
+
+# --- 호스트별 응답: (상태코드, 본문, Content-Type) ---
+
+def upbit(fx, path, query):
+    if path == "/v1/market/all":
+        return 200, fx.upbit_markets, None
+    if path == "/v1/ticker":
+        markets = first(query, "markets").split(",")
+        tickers = [fx.upbit_tickers[m] for m in markets if m in fx.upbit_tickers]
+        if not tickers:
+            return 404, {"error": {"name": 404, "message": "Code not found"}}, None
+        return 200, tickers, None
+    return 404, {"error": {"message": "not found"}}, None
+
+def bithumb(fx, path, query):
+    symbol = path.rsplit("/", 1)[-1].split("_", 1)[0]
+    if symbol == "ALL":
+        return 200, fx.bithumb, None
+    item = fx.bithumb["data"].get(symbol)
+    if item is None:
+        return 200, {"status": "5500", "message": "Invalid Parameter"}, None
+    return 200, {"status": "0000", "data": item}, None
+
+def coinmarketcap(fx, path, query):
+    convert = first(query, "convert", "USD")
+    if path.endswith("/listings/latest"):
+        items = [{**item, "quote": {convert: item["quote"][convert]}} for item in fx.cmc["data"].values()]
+        return 200, {"status": {"error_code": 0}, "data": items[:int(first(query, "limit", "100"))]}, None
+    data = {}
+    for symbol in first(query, "symbol").split(","):
+        item = fx.cmc["data"].get(symbol)
+        if item is not None and convert in item["quote"]:
+            data[symbol] = {**item, "quote": {convert: item["quote"][convert]}}
+    if not data and first(query, "skip_invalid") != "true":
+        return 400, {"status": {"error_code": 400, "error_message": "Invalid value for \"symbol\""}}, None
+    return 200, {"status": {"error_code": 0}, "data": data}, None
+
+def naver_search(fx, path, query):
+    return 200, fx.fx, None
+
+def er_api(fx, path, query):
+    return 200, fx.er_api, None
+
+def naver_finance(fx, path, query):
+    html = "text/html; charset=euc-kr"
+    if path.startswith("/item/"):
+        return 200, fx.naver_item, html
+    if path.startswith("/sise/"):
+        return 200, fx.naver_sise, html
+    if path.startswith("/search/"):
+        return 200, fx.naver_search, html
+    return 404, b"", html
+
+def naver_mobile(fx, path, query):
+    return 200, fx.naver_m_search, None
+
+def yahoo(fx, path, query):
+    if path.startswith("/v8/finance/chart/"):
+        ticker = path.rsplit("/", 1)[-1]
+        meta = fx.yahoo_chart.get(ticker)
+        if meta is None:
+            return 404, {"chart": {"result": None, "error": {"code": "Not Found"}}}, None
+        return 200, {"chart": {"result": [{"meta": meta}], "error": None}}, None
+    if path.startswith("/v1/finance/screener/"):
+        return 200, fx.yahoo_screener.get(first(query, "scrIds"), {"finance": {"result": []}}), None
+    return 404, {}, None
+
+ROUTES = {
+    "api.upbit.com": upbit,
+    "api.bithumb.com": bithumb,
+    "pro-api.coinmarketcap.com": coinmarketcap,
+    "search.naver.com": naver_search,
+    "finance.naver.com": naver_finance,
+    "m.stock.naver.com": naver_mobile,
+    "query1.finance.yahoo.com": yahoo,
+    "query2.finance.yahoo.com": yahoo,
+    "open.er-api.com": er_api,
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: 실서비스 세션 재사용과 같은 조건
+    fixtures = None
+    latency = 0.0
+    jitter = 0.0
+    host_latency = {}
+    error_rate = 0.0
+    error_status = 503
+    seed = 0
+    counters = {}
+    lock = threading.Lock()
+
+    def rng(self, key):
+        with self.lock:
+            n = self.counters[key] = self.counters.get(key, 0) + 1
+        return random.Random(f"{self.seed}:{key}:{n}")
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        _, host, path = parts.path.split("/", 2) if parts.path.count("/") >= 2 else ("", parts.path.strip("/"), "")
+        path = "/" + path
+        route = ROUTES.get(host)
+        rng = self.rng(host + path)
+
+        base, jitter = self.host_latency.get(host, (self.latency, self.jitter))
+        delay = max(0.0, base + rng.uniform(-jitter, jitter))
+        if delay:
+            time.sleep(delay / 1000)
+
+        if route is None:
+            self.reply(404, {"error": f"unknown host {host}"})
+        elif rng.random() < self.error_rate:
+            self.reply(self.error_status, {"error": "injected"})
+        else:
+            status, body, content_type = route(self.fixtures, path, parse_qs(parts.query))
+            self.reply(status, body, content_type)
+
+    def reply(self, status, body, content_type=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            content_type = content_type or "application/json; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def parse_host_latency(specs):
+    """["api.upbit.com=30:10", ...] → {호스트: (평균 ms, 흔들림 ms)}"""
+    latency = {}
+    for spec in specs or []:
+        host, value = spec.split("=", 1)
+        base, _, jitter = value.partition(":")
+        latency[host] = (float(base), float(jitter or 0))
+    return latency
+
+def make_server(host="127.0.0.1", port=8800, latency=0.0, jitter=0.0, host_latency=None,
+                error_rate=0.0, error_status=503, seed=0):
+    handler = type("Handler", (StubHandler,), {
+        "fixtures": Fixtures(),
+        "latency": latency,
+        "jitter": jitter,
+        "host_latency": host_latency or {},
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "seed": seed,
+        "counters": {},
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="업스트림 녹화 응답 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연 평균(ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="응답 지연 흔들림 ±ms")
+    parser.add_argument("--host-latency", action="append", help="호스트별 지연: api.upbit.com=30:10 (여러 번 지정 가능)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="에러 응답 비율 (0~1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.latency, args.jitter, parse_host_latency(args.host_latency),
+                         args.error_rate, args.error_status, args.seed)
+    print(f"listening on http://{args.host}:{args.port}  (UPSTREAM_OVERRIDE=\"*=http://{args.host}:{args.port}/{{host}}\")")
+    server.serve_forever()
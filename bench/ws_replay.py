@@ -0,0 +1,184 @@
+"""
+녹화된 WebSocket 프레임을 그대로 재생하는 로컬 대역 서버 (표준 라이브러리만 사용)
+
+    python bench/ws_replay.py bench/fixtures/upbit_ws.jsonl --port 8765 --binary --loop
+    UPBIT_WS_URL=ws://127.0.0.1:8765 TICKER_STREAM=1 python main.py
+
+fixture 파일은 한 줄에 프레임 하나. 접속마다 첫 클라이언트 프레임(구독 요청)을 받은 뒤 재생한다.
+
+    python bench/ws_replay.py --check
+
+--check: 업비트/빗썸 fixture 재생 서버를 함께 띄우고 ticker_stream.TickerStreams 를 붙여,
+테이블의 심볼별 가격이 fixture 마지막 체결가와 같은지와 on_update 호출 수를 확인한다 (실패하면 종료 코드 1).
+"""
+import argparse
+import base64
+import hashlib
+import os
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def read_frame(sock):
+    """클라이언트 프레임 하나를 읽어 (opcode, payload) 반환"""
+    head = sock.recv(2)
+    if len(head) < 2:
+        return None, b""
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", sock.recv(2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", sock.recv(8))[0]
+    mask = sock.recv(4) if head[1] & 0x80 else b""
+    payload = b""
+    while len(payload) < length:
+        chunk = sock.recv(length - len(payload))
+        if not chunk:
+            break
+        payload += chunk
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+def encode_frame(payload, opcode):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack(">BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+class ReplayHandler(socketserver.BaseRequestHandler):
+    frames = []
+    binary = False
+    interval = 0.05
+    loop = False
+    verbose = True
+
+    def handshake(self):
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = self.request.recv(1024)
+            if not chunk:
+                return False
+            data += chunk
+        key = ""
+        for line in data.decode("latin-1").split("\r\n"):
+            if line.lower().startswith("sec-websocket-key:"):
+                key = line.split(":", 1)[1].strip()
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.request.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    def handle(self):
+        if not self.handshake():
+            return
+        opcode, payload = read_frame(self.request)
+        if self.verbose:
+            print(f"subscribe: {payload[:200]!r}")
+        opcode = 0x2 if self.binary else 0x1
+        try:
+            while True:
+                for frame in self.frames:
+                    self.request.sendall(encode_frame(frame, opcode))
+                    time.sleep(self.interval)
+                if not self.loop:
+                    break
+            self.request.sendall(encode_frame(b"", 0x8))
+        except OSError:
+            pass
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def read_frames(fixture):
+    with open(fixture, "rb") as f:
+        return [line.rstrip(b"\n") for line in f if line.strip()]
+
+def make_server(fixture, host="127.0.0.1", port=8765, binary=False, interval=0.05, loop=False, verbose=True):
+    handler = type("Handler", (ReplayHandler,), {
+        "frames": read_frames(fixture), "binary": binary, "interval": interval, "loop": loop, "verbose": verbose,
+    })
+    return ReplayServer((host, port), handler)
+
+def check(timeout=5.0):
+    """fixture 재생 → TickerStreams 테이블 확인. 모두 맞으면 True"""
+    sys.path.insert(0, ROOT)
+    from ticker_stream import TickerStreams, bithumb_parse, upbit_parse
+
+    parsers = {"upbit": upbit_parse, "bithumb": bithumb_parse}
+    expected = {}  # 거래소 → {심볼: 마지막 체결가}
+    frames = 0
+    servers = {}
+    for name, parse in parsers.items():
+        fixture = os.path.join(FIXTURES, f"{name}_ws.jsonl")
+        expected[name] = {}
+        for raw in read_frames(fixture):
+            for symbol, price, _ in parse(raw):
+                expected[name][symbol] = price
+                frames += 1
+        # 업비트는 실서비스처럼 바이너리 프레임으로 보낸다
+        servers[name] = make_server(fixture, port=0, binary=name == "upbit", interval=0.01, verbose=False)
+        threading.Thread(target=servers[name].serve_forever, daemon=True).start()
+
+    updates = []
+    streams = TickerStreams()
+    streams.start(lambda: list(expected["upbit"]), lambda: list(expected["bithumb"]),
+                  upbit_url=f"ws://127.0.0.1:{servers['upbit'].server_address[1]}",
+                  bithumb_url=f"ws://127.0.0.1:{servers['bithumb'].server_address[1]}",
+                  on_update=lambda exchange, symbol, price: updates.append((exchange, symbol, price)))
+    lookups = {"upbit": streams.upbit_price, "bithumb": streams.bithumb_price}
+
+    def table():
+        return {name: {s: (lookups[name](s) or (None,))[0] for s in prices} for name, prices in expected.items()}
+
+    deadline = time.monotonic() + timeout
+    got = table()
+    while (got != expected or len(updates) < frames) and time.monotonic() < deadline:
+        time.sleep(0.05)
+        got = table()
+    streams.stop()
+    for server in servers.values():
+        server.shutdown()
+
+    ok = got == expected and len(updates) >= frames
+    for name, prices in expected.items():
+        for symbol, price in prices.items():
+            mark = "ok" if got[name][symbol] == price else "FAIL"
+            print(f"{mark:4} {name:8}{symbol:6} 기대 {price:>14,} | 테이블 {got[name][symbol]}")
+    print(f"{'ok' if len(updates) >= frames else 'FAIL':4} on_update {len(updates)}회 (fixture 체결 {frames}건)")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket 프레임 재생 서버")
+    parser.add_argument("fixture", nargs="?")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--binary", action="store_true", help="업비트처럼 바이너리 프레임으로 전송")
+    parser.add_argument("--interval", type=float, default=0.05, help="프레임 사이 간격(초)")
+    parser.add_argument("--loop", action="store_true", help="끝나면 처음부터 반복")
+    parser.add_argument("--check", action="store_true", help="업비트/빗썸 fixture로 TickerStreams 를 확인하고 종료")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check() else 1)
+    if not args.fixture:
+        parser.error("fixture 파일을 지정하세요 (또는 --check)")
+    server = make_server(args.fixture, args.host, args.port, args.binary, args.interval, args.loop)
+    print(f"replaying {args.fixture} on ws://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+# 연속 실패가 이 횟수에 이르면 차단(open)
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))
+# 차단 후 이 시간(초)이 지나면 시험 요청 하나만 보내본다(half-open)
+BREAKER_RESET = float(os.environ.get("BREAKER_RESET", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpen(Exception):
+    """차단 중인 업스트림 — 기다리지 않고 바로 실패"""
+
+class CircuitBreaker:
+    """
+    업스트림 하나의 closed → open → half_open 상태 관리.
+    open 동안은 allow()가 False라 호출 자체를 건너뛰고,
+    reset_timeout이 지나면 한 번에 하나의 시험 요청만 통과시켜 성공하면 다시 closed로 돌아간다.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                    print(f"Circuit Breaker Open: {self.name} ({self.failures}회 연속 실패)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures,
+                    "opened": self.opened, "rejected": self.rejected}
@@ -0,0 +1,68 @@
+from fetch_pool import hedged
+from http_client import hedge_delay, http_get
+from metrics import instrument
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+# 같은 API를 서비스하는 보조 호스트 (query1이 늦으면 헤지 요청을 보낸다)
+YAHOO_CHART_BACKUP_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
+
+class FastQuote:
+    """미국 주식/지수 시세 중 실제로 쓰는 값만 담는 가벼운 레코드"""
+
+    __slots__ = ("symbol", "price", "prev_close", "volume")
+
+    def __init__(self, symbol, price, prev_close, volume=0):
+        self.symbol = symbol
+        self.price = price
+        self.prev_close = prev_close
+        self.volume = volume or 0
+
+    @property
+    def change_pct(self):
+        if not self.prev_close:
+            return 0
+        return (self.price - self.prev_close) / self.prev_close * 100
+
+    def is_valid(self):
+        return self.price is not None and self.prev_close is not None
+
+    def __repr__(self):
+        return f"FastQuote({self.symbol!r}, {self.price!r}, {self.prev_close!r}, {self.volume!r})"
+
+@instrument("yahoo_chart")
+def fetch_chart_quote(ticker, url=YAHOO_CHART_URL):
+    """
+    야후 chart API의 meta 필드만 읽어 FastQuote 반환 (quoteSummary 전체를 받는 .info 보다 훨씬 가볍다)
+    값이 없으면 None
+    """
+    r = http_get(url.format(ticker=ticker), params={"range": "1d", "interval": "1d"})
+    if r.status_code != 200:
+        return None
+    result = (r.json().get("chart") or {}).get("result") or []
+    if not result:
+        return None
+    meta = result[0].get("meta", {})
+    prev = meta.get("previousClose") or meta.get("chartPreviousClose")
+    quote = FastQuote(ticker, meta.get("regularMarketPrice"), prev, meta.get("regularMarketVolume"))
+    return quote if quote.is_valid() else None
+
+@instrument("yahoo_info")
+def fetch_info_quote(ticker):
+    """yfinance .info 기반 (느림, chart API 실패 시에만 사용)"""
+    import yfinance as yf
+
+    info = yf.Ticker(ticker).info
+    return FastQuote(ticker, info.get("regularMarketPrice"),
+                     info.get("regularMarketPreviousClose"), info.get("volume"))
+
+def fetch_fast_quote(ticker):
+    try:
+        quote = hedged("yahoo_chart",
+                       lambda: fetch_chart_quote(ticker),
+                       lambda: fetch_chart_quote(ticker, YAHOO_CHART_BACKUP_URL),
+                       hedge_delay(YAHOO_CHART_URL), ok=lambda q: q is not None)
+        if quote:
+            return quote
+    except Exception as e:
+        print(f"Yahoo Chart Quote Error {ticker}: {e}")
+    return fetch_info_quote(ticker)
@@ -0,0 +1,65 @@
+import contextvars
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import CURRENT_COMMAND, DEADLINE_TOTAL, HEDGE_TOTAL
+
+# 모든 시세 조회가 공유하는 스레드 풀
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "16"))
+FETCH_DEADLINE = float(os.environ.get("FETCH_DEADLINE", "4.0"))
+
+EXECUTOR = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+
+# 헤지 요청 전용 풀: fan_out 작업 안에서 헤지 결과를 기다려도 같은 풀을 두고 서로 막히지 않게 분리
+HEDGE_WORKERS = int(os.environ.get("HEDGE_WORKERS", "8"))
+HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+
+def fan_out(calls, deadline=None):
+    """
+    {이름: (함수, 인자...)} 형태의 독립 호출들을 동시에 실행.
+    deadline(초) 안에 끝난 결과는 {이름: 반환값}으로,
+    시간 초과나 예외로 끝난 호출은 {이름: 실패 사유}로 돌려준다.
+    """
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+    futures = {}
+    for name, call in calls.items():
+        func, args = call[0], call[1:]
+        # 호출한 쪽의 명령어 종류 등 contextvar를 작업 스레드에도 넘긴다
+        futures[EXECUTOR.submit(contextvars.copy_context().run, func, *args)] = name
+
+    done, _ = wait(futures, timeout=deadline)
+    results = {}
+    failed = {}
+    for fut, name in futures.items():
+        if fut not in done:
+            fut.cancel()
+            DEADLINE_TOTAL.inc(name, CURRENT_COMMAND.get())
+            failed[name] = f"응답 시간 초과 ({deadline:g}초)"
+        elif fut.exception() is not None:
+            failed[name] = f"에러: {fut.exception()}"
+        else:
+            results[name] = fut.result()
+    return results, failed
+
+def hedged(name, primary, backup, delay, ok=None):
+    """
+    primary()가 delay(초) 안에 성공하지 못하면 backup()도 띄워 먼저 성공한 결과를 돌려준다.
+    ok(결과)가 False면 실패로 본다. 둘 다 실패하면 primary의 결과(또는 예외)를 그대로 낸다.
+    """
+    ok = ok or (lambda result: True)
+    first = HEDGE_EXECUTOR.submit(contextvars.copy_context().run, primary)
+    done, _ = wait([first], timeout=delay)
+    if done and first.exception() is None and ok(first.result()):
+        HEDGE_TOTAL.inc(name, "primary")
+        return first.result()
+
+    HEDGE_TOTAL.inc(name, "fired")
+    second = HEDGE_EXECUTOR.submit(contextvars.copy_context().run, backup)
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None and ok(fut.result()):
+                HEDGE_TOTAL.inc(name, "primary" if fut is first else "backup")
+                return fut.result()
+    return first.result()
@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from circuit_breaker import CircuitBreaker, CircuitOpen
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# 호스트별 (동시 요청 수, 타임아웃(초), GET 재시도 횟수)
+HOST_LIMITS = {
+    "api.upbit.com": (8, 3, 1),
+    "api.bithumb.com": (8, 5, 1),
+    "pro-api.coinmarketcap.com": (4, 5, 0),  # 호출 한도가 있어 재시도하지 않음
+    "finance.naver.com": (8, 5, 1),
+    "search.naver.com": (4, 5, 1),
+    "m.stock.naver.com": (4, 5, 1),
+    "query1.finance.yahoo.com": (8, 3, 1),
+    "query2.finance.yahoo.com": (8, 3, 1),
+    "open.er-api.com": (4, 3, 1),
+    "kind.krx.co.kr": (2, 10, 2),
+}
+DEFAULT_LIMIT = (4, 5, 1)
+
+# 이 상태 코드는 업스트림 장애로 보고 차단기 실패로 센다
+BREAKER_STATUSES = frozenset({429, 500, 502, 503, 504})
+# 헤지 지연: 최근 성공 응답 지연의 이 백분위수 (표본이 적으면 HEDGE_DEFAULT_DELAY)
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", "0.5"))
+HEDGE_MIN_DELAY = 0.05
+LATENCY_WINDOW = 256
+
+def parse_overrides(spec):
+    """
+    "api.upbit.com=http://127.0.0.1:8800/api.upbit.com,*=http://127.0.0.1:8800/{host}" → {호스트: 대체 주소}
+    벤치마크에서 업스트림을 로컬 대역 서버(bench/stub_server.py)로 돌릴 때 쓴다.
+    """
+    overrides = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        host, base = item.split("=", 1)
+        overrides[host.strip()] = base.strip().rstrip("/")
+    return overrides
+
+UPSTREAM_OVERRIDE = parse_overrides(os.environ.get("UPSTREAM_OVERRIDE"))
+
+def upstream_url(url, host):
+    """UPSTREAM_OVERRIDE에 해당하는 호스트면 경로/쿼리는 그대로 두고 주소만 바꾼다"""
+    base = UPSTREAM_OVERRIDE.get(host) or UPSTREAM_OVERRIDE.get("*")
+    if not base:
+        return url
+    parts = urlsplit(url)
+    return base.format(host=host) + parts.path + (f"?{parts.query}" if parts.query else "")
+
+class HostPool:
+    """호스트 하나에 대한 keep-alive 세션 + 동시 요청 제한 + 지연/에러 집계"""
+
+    def __init__(self, host, concurrency, timeout, retries):
+        self.host = host
+        self.timeout = timeout
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            allowed_methods=frozenset({"GET"}),
+            status_forcelist=(502, 503, 504),
+            backoff_factor=0.1,
+            backoff_jitter=0.1,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.statuses = {}
+        self.short_circuits = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.breaker = CircuitBreaker(host)
+
+    def record(self, elapsed, status=None, error=None, upstream=True):
+        # upstream=False: 이쪽 동시 요청 한도에 걸린 경우라 차단기 판단에는 넣지 않는다
+        if upstream:
+            if error is not None or status in BREAKER_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        with self.lock:
+            if error is None and status is not None and status < 500:
+                self.latencies.append(elapsed)
+            self.requests += 1
+            self.latency_sum += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if status >= 500:
+                    self.errors += 1
+            if error is not None:
+                self.errors += 1
+                if isinstance(error, requests.Timeout):
+                    self.timeouts += 1
+
+    def get(self, url, timeout=None, **kwargs):
+        timeout = self.timeout if timeout is None else timeout
+        if not self.semaphore.acquire(timeout=timeout):
+            error = requests.Timeout(f"{self.host} 동시 요청 한도 초과")
+            self.record(0.0, error=error, upstream=False)
+            raise error
+        if not self.breaker.allow():
+            self.semaphore.release()
+            raise self.short_circuit()
+        start = time.perf_counter()
+        try:
+            r = self.session.get(url, timeout=timeout, **kwargs)
+        except Exception as e:
+            self.record(time.perf_counter() - start, error=e)
+            raise
+        finally:
+            self.semaphore.release()
+        self.record(time.perf_counter() - start, status=r.status_code)
+        return r
+
+    def post(self, url, timeout=None, **kwargs):
+        """재시도 없는 POST (Retry 설정이 GET에만 적용된다)"""
+        timeout = self.timeout if timeout is None else timeout
+        if not self.breaker.allow():
+            raise self.short_circuit()
+        start = time.perf_counter()
+        try:
+            r = self.session.post(url, timeout=timeout, **kwargs)
+        except Exception as e:
+            self.record(time.perf_counter() - start, error=e)
+            raise
+        self.record(time.perf_counter() - start, status=r.status_code)
+        return r
+
+    def short_circuit(self):
+        with self.lock:
+            self.short_circuits += 1
+        return CircuitOpen(f"{self.host} 일시 차단 중 (연속 실패)")
+
+    def latency_percentile(self, pct, default=None):
+        """최근 성공 응답 지연(초)의 백분위수. 표본이 20개 미만이면 default"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < 20:
+            return default
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def hedge_delay(self):
+        """이 호스트 응답이 평소보다 늦다고 볼 시점(초) — 이때 백업 요청을 띄운다"""
+        delay = self.latency_percentile(HEDGE_PERCENTILE, HEDGE_DEFAULT_DELAY)
+        return min(max(delay, HEDGE_MIN_DELAY), self.timeout)
+
+    def stats(self):
+        breaker = self.breaker.stats()
+        hedge = self.hedge_delay()
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "avg_ms": round(self.latency_sum / self.requests * 1000, 1) if self.requests else 0.0,
+                "max_ms": round(self.latency_max * 1000, 1),
+                "statuses": dict(self.statuses),
+                "short_circuits": self.short_circuits,
+                "breaker": breaker,
+                "hedge_delay_ms": round(hedge * 1000, 1),
+            }
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def pool_for(host):
+    pool = _pools.get(host)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(host)
+            if pool is None:
+                pool = _pools[host] = HostPool(host, *HOST_LIMITS.get(host, DEFAULT_LIMIT))
+    return pool
+
+def http_get(url, params=None, headers=None, timeout=None):
+    """
+    모든 외부 호출이 쓰는 GET. 호스트별 연결 풀을 재사용하고 기본 헤더/타임아웃을 적용한다.
+    """
+    host = urlsplit(url).hostname
+    if UPSTREAM_OVERRIDE:
+        url = upstream_url(url, host)
+    return pool_for(host).get(url, params=params, headers=headers, timeout=timeout)
+
+def http_post(url, json=None, headers=None, timeout=None):
+    return pool_for(urlsplit(url).hostname).post(url, json=json, headers=headers, timeout=timeout)
+
+def hedge_delay(url):
+    return pool_for(urlsplit(url).hostname).hedge_delay()
+
+def http_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {host: pool.stats() for host, pool in sorted(pools.items())}
@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from http_client import http_post
+
+CALLBACK_WORKERS = int(os.environ.get("CALLBACK_WORKERS", "8"))
+# 카카오 callbackUrl 은 1분간 유효
+CALLBACK_DEADLINE = float(os.environ.get("CALLBACK_DEADLINE", "50"))
+
+ACK_TEXT = "조회 중입니다. 잠시만 기다려 주세요."
+TIMEOUT_TEXT = "조회 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+
+def kakao_callback_ack(text=ACK_TEXT):
+    """useCallback 즉시 응답 (실제 결과는 callbackUrl로 따로 보낸다)"""
+    return {"version": "2.0", "useCallback": True, "data": {"text": text}}
+
+class CallbackJob:
+    def __init__(self, callback_url):
+        self.callback_urls = [callback_url]
+
+class CallbackDispatcher:
+    """
+    느린 명령어를 백그라운드에서 처리해 callbackUrl로 결과를 POST 한다.
+    같은 발화가 처리 중이면 새로 조회하지 않고 callbackUrl만 붙여 같은 결과를 보낸다.
+    """
+
+    def __init__(self, dispatch, render, workers=CALLBACK_WORKERS, deadline=CALLBACK_DEADLINE):
+        self.dispatch = dispatch
+        self.render = render
+        self.deadline = deadline
+        self.workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="callback")
+        # 데드라인을 넘긴 조회를 기다리지 않고 버릴 수 있도록 실제 조회는 별도 풀에서
+        self.compute = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="callback-compute")
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduped = 0
+        self.timeouts = 0
+        self.post_errors = 0
+
+    def submit(self, utter, callback_url):
+        with self._lock:
+            self.submitted += 1
+            job = self._inflight.get(utter)
+            if job is not None:
+                job.callback_urls.append(callback_url)
+                self.deduped += 1
+                return
+            job = self._inflight[utter] = CallbackJob(callback_url)
+        self.workers.submit(self._run, utter, job)
+
+    def _run(self, utter, job):
+        try:
+            text = self.compute.submit(self.dispatch, utter).result(timeout=self.deadline)
+        except FutureTimeout:
+            self.timeouts += 1
+            text = TIMEOUT_TEXT
+        except Exception as e:
+            text = f"조회 중 오류 발생: {e}"
+        with self._lock:
+            self._inflight.pop(utter, None)
+            callback_urls = list(job.callback_urls)
+        payload = self.render(text)
+        for url in callback_urls:
+            try:
+                r = http_post(url, json=payload)
+                if r.status_code != 200:
+                    self.post_errors += 1
+                    print(f"Kakao Callback Error: status {r.status_code}")
+            except Exception as e:
+                self.post_errors += 1
+                print(f"Kakao Callback Error: {e}")
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            "submitted": self.submitted,
+            "deduped": self.deduped,
+            "timeouts": self.timeouts,
+            "post_errors": self.post_errors,
+            "inflight": inflight,
+        }
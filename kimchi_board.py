@@ -0,0 +1,172 @@
+import os
+from datetime import datetime
+
+from fetch_pool import fan_out
+from http_client import http_get
+from metrics import instrument
+from quote_history import QUOTE_HISTORY
+from ranking_snapshot import KST
+
+UPBIT_TICKER_URL = "https://api.upbit.com/v1/ticker"
+BITHUMB_ALL_URL = "https://api.bithumb.com/public/ticker/ALL_KRW"
+CMC_LISTINGS_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
+
+# 업비트 /v1/ticker 한 번에 넣는 마켓 수 (URL 길이 제한 대비)
+UPBIT_CHUNK = 100
+# CMC 시가총액 상위 몇 개까지 받을지 (200개당 1크레딧)
+CMC_LISTING_LIMIT = int(os.environ.get("KIMCHI_CMC_LIMIT", "500"))
+# 이보다 큰 프리미엄은 같은 티커의 다른 코인(심볼 충돌)으로 보고 제외
+MAX_PREMIUM = float(os.environ.get("KIMCHI_MAX_PREMIUM", "50"))
+TOP_N = 5
+
+def format_krw(price):
+    if price >= 100:
+        return f"{price:,.0f}"
+    return f"{price:,.2f}" if price >= 1 else f"{price:.4f}"
+
+@instrument("upbit")
+def fetch_upbit_frame(symbols):
+    """업비트 KRW 마켓 시세를 UPBIT_CHUNK개씩 묶어 조회 → DataFrame(index=심볼)"""
+    import pandas as pd
+
+    rows = []
+    for i in range(0, len(symbols), UPBIT_CHUNK):
+        markets = ",".join(f"KRW-{s}" for s in symbols[i:i + UPBIT_CHUNK])
+        r = http_get(UPBIT_TICKER_URL, params={"markets": markets})
+        if r.status_code != 200:
+            raise RuntimeError(f"Upbit API 접속 실패 (status:{r.status_code})")
+        rows.extend(r.json())
+    frame = pd.DataFrame(rows, columns=["market", "trade_price", "signed_change_rate", "acc_trade_price_24h"])
+    frame.index = frame.pop("market").str.split("-", n=1).str[1]
+    QUOTE_HISTORY.record_many("upbit", dict(zip(frame.index, frame["trade_price"])))
+    return frame.rename(columns={"trade_price": "upbit", "signed_change_rate": "upbit_change",
+                                 "acc_trade_price_24h": "upbit_turnover"}).astype(float)
+
+@instrument("bithumb")
+def fetch_bithumb_frame():
+    """빗썸 ALL_KRW 한 번 → DataFrame(index=심볼)"""
+    import pandas as pd
+
+    r = http_get(BITHUMB_ALL_URL)
+    if r.status_code != 200:
+        raise RuntimeError(f"Bithumb API 접속 실패 (status:{r.status_code})")
+    data = r.json()
+    if data.get("status") != "0000":
+        raise RuntimeError("Bithumb 데이터 없음")
+    items = {s: item for s, item in data["data"].items() if isinstance(item, dict)}
+    frame = pd.DataFrame.from_dict(items, orient="index",
+                                   columns=["closing_price", "fluctate_rate_24H", "acc_trade_value_24H"])
+    frame = frame.apply(pd.to_numeric, errors="coerce")
+    QUOTE_HISTORY.record_many("bithumb", frame["closing_price"].dropna().to_dict())
+    return frame.rename(columns={"closing_price": "bithumb", "fluctate_rate_24H": "bithumb_change",
+                                 "acc_trade_value_24H": "bithumb_turnover"})
+
+@instrument("cmc_listings")
+def fetch_cmc_frame(api_key, limit=CMC_LISTING_LIMIT):
+    """CMC listings/latest 한 번으로 시가총액 상위 limit개 → DataFrame(index=심볼, usd, usd_change)"""
+    import pandas as pd
+
+    headers = {"Accepts": "application/json", "X-CMC_PRO_API_KEY": api_key}
+    r = http_get(CMC_LISTINGS_URL, headers=headers, params={"limit": limit, "convert": "USD"})
+    if r.status_code != 200:
+        raise RuntimeError(f"CMC API 접속 실패 (status:{r.status_code})")
+    rows = [(item["symbol"], item["quote"]["USD"]["price"], item["quote"]["USD"]["percent_change_24h"])
+            for item in r.json().get("data", [])]
+    frame = pd.DataFrame(rows, columns=["symbol", "usd", "usd_change"])
+    # 같은 심볼이 여럿이면 순위(시가총액)가 높은 쪽만
+    frame = frame.drop_duplicates("symbol").set_index("symbol")
+    # 캐시에서 꺼내 쓸 때도 글로벌 시세가 언제 값인지 보드에 표시할 수 있게
+    frame.attrs["fetched_at"] = datetime.now(KST)
+    return frame
+
+def compute_board(upbit, bithumb, cmc, krw_usd):
+    """
+    심볼 기준으로 세 거래소 시세를 맞춰 한 번에 계산.
+    premium: 업비트 기준 김프 (업비트에 없으면 빗썸 기준), spread: 업비트 대비 빗썸 괴리
+    """
+    frame = upbit.join(bithumb, how="outer").join(cmc, how="inner")
+    global_krw = frame["usd"] * krw_usd
+    frame["premium_upbit"] = (frame["upbit"] / global_krw - 1) * 100
+    frame["premium_bithumb"] = (frame["bithumb"] / global_krw - 1) * 100
+    frame["premium"] = frame["premium_upbit"].fillna(frame["premium_bithumb"])
+    frame["spread"] = (frame["bithumb"] / frame["upbit"] - 1) * 100
+    frame["price"] = frame["upbit"].fillna(frame["bithumb"])
+    frame["turnover"] = frame["upbit_turnover"].fillna(0) + frame["bithumb_turnover"].fillna(0)
+    return frame[frame["premium"].abs() <= MAX_PREMIUM]
+
+class BoardSnapshot:
+    """한 번 계산한 김프 보드 (생성 후 변경하지 않음)"""
+
+    def __init__(self, frame, krw_usd, counts, failures, global_at=None):
+        self.frame = frame
+        self.krw_usd = krw_usd
+        self.counts = counts  # {"업비트": n, "빗썸": n, "CMC": n}
+        self.failures = failures
+        self.updated_at = datetime.now(KST)
+        self.global_at = global_at or self.updated_at
+        self.reply = self.render()
+
+    def render(self, top_n=TOP_N):
+        frame = self.frame
+        lines = [f"🧮 김치 프리미엄 보드 (환율 ₩{self.krw_usd:,.2f})",
+                 " | ".join(f"{name} {n}종" for name, n in self.counts.items()) + f" | 비교 {len(frame)}종"]
+        if len(frame):
+            weights = frame["turnover"]
+            weighted = (frame["premium"] * weights).sum() / weights.sum() if weights.sum() else frame["premium"].mean()
+            lines.append(f"📊 중앙값 {frame['premium'].median():+.2f}% | 거래대금 가중 {weighted:+.2f}%")
+
+            lines.append(f"\n🔺 김프 TOP{top_n}")
+            for i, row in enumerate(frame.nlargest(top_n, "premium").itertuples()):
+                lines.append(f"{i+1}. {row.Index} {row.premium:+.2f}% (₩{format_krw(row.price)})")
+            lines.append(f"\n🔻 역프 TOP{top_n}")
+            for i, row in enumerate(frame.nsmallest(top_n, "premium").itertuples()):
+                lines.append(f"{i+1}. {row.Index} {row.premium:+.2f}% (₩{format_krw(row.price)})")
+
+            both = frame.dropna(subset=["spread"])
+            if len(both):
+                lines.append(f"\n↔️ 업비트-빗썸 괴리 TOP{top_n}")
+                top = both.loc[both["spread"].abs().nlargest(top_n).index]
+                for i, row in enumerate(top.itertuples()):
+                    lines.append(f"{i+1}. {row.Index} 빗썸 {row.spread:+.2f}% (₩{format_krw(row.upbit)} / ₩{format_krw(row.bithumb)})")
+        if self.failures:
+            lines.append("\n[접근 실패 정보]\n" + "\n".join(f"{name}: {err}" for name, err in self.failures.items()))
+        lines.append(f"\n⏱ {self.updated_at:%m/%d %H:%M} 기준 (CMC 시세 {self.global_at:%H:%M})")
+        return "\n".join(lines)
+
+class KimchiBoard:
+    """
+    업비트/빗썸/CMC 전체 시세를 각각 한 번씩만 받아 모든 상장 코인의 김프를 한 번에 계산한다.
+    symbols(): 업비트 KRW 심볼 목록, exchange_rate(): (환율, 에러), cmc_listings(): CMC DataFrame
+    """
+
+    def __init__(self, symbols, exchange_rate, cmc_listings):
+        self.symbols = symbols
+        self.exchange_rate = exchange_rate
+        self.cmc_listings = cmc_listings
+
+    def build(self):
+        import pandas as pd
+
+        results, failed = fan_out({
+            "업비트": (fetch_upbit_frame, self.symbols()),
+            "빗썸": (fetch_bithumb_frame,),
+            "CMC": (self.cmc_listings,),
+            "환율": (self.exchange_rate,),
+        })
+        if "CMC" not in results:
+            raise RuntimeError(f"글로벌 시세 없음 ({failed.get('CMC')})")
+        if "업비트" not in results and "빗썸" not in results:
+            raise RuntimeError("국내 거래소 시세 없음")
+        krw_usd, fx_err = results.get("환율", (None, failed.get("환율")))
+        if krw_usd is None:
+            raise RuntimeError(f"환율 없음 ({fx_err})")
+        if fx_err:
+            failed["환율"] = fx_err
+
+        empty_upbit = pd.DataFrame(columns=["upbit", "upbit_change", "upbit_turnover"], dtype=float)
+        empty_bithumb = pd.DataFrame(columns=["bithumb", "bithumb_change", "bithumb_turnover"], dtype=float)
+        upbit = results.get("업비트", empty_upbit)
+        bithumb = results.get("빗썸", empty_bithumb)
+        frame = compute_board(upbit, bithumb, results["CMC"], krw_usd)
+        counts = {"업비트": len(upbit), "빗썸": len(bithumb), "CMC": len(results["CMC"])}
+        return BoardSnapshot(frame, krw_usd, counts, failed, results["CMC"].attrs.get("fetched_at"))
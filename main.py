@@ -1,62 +1,42 @@
+# 시작 시간 측정 기준점이라 가장 먼저 불러온다
+from startup import STARTUP, WARMUP_IMPORTS, WARMUP_SYMBOLS, preload_modules
 from flask import Flask, request, jsonify
-import requests
-import yfinance as yf
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import os
+import time
 import json
+import re
+
+import naver_scrape
+from fetch_pool import fan_out, hedged
+from http_client import hedge_delay, http_get, http_stats
+from metrics import REGISTRY, error_at, instrument, render_metrics, track_request
+from quote_cache import QUOTE_CACHE
+from singleflight import SingleFlight
+from upbit_catalog import UPBIT_CATALOG
+from stock_index import STOCK_INDEX, is_choseong_query, normalize as normalize_name
+from fast_quote import FastQuote, fetch_fast_quote
+from ticker_stream import TICKER_STREAMS
+from ranking_snapshot import KST, RANKINGS
+from kakao_callback import CallbackDispatcher, kakao_callback_ack
+from kimchi_board import KimchiBoard, fetch_cmc_frame, format_krw
+from quote_history import QUOTE_HISTORY, sparkline
+
+STARTUP.mark("imports")
 
 app = Flask(__name__)
 
 load_dotenv()
 CMC_API_KEY = os.environ.get("CMC_API_KEY")
     
-def get_upbit_symbol_map():
-    try:
-        url = "https://api.upbit.com/v1/market/all"
-        r = requests.get(url, timeout=3)
-        if r.status_code != 200:
-            return {}
-        markets = r.json()
-        name2symbol = {}
-        for m in markets:
-            if m["market"].startswith("KRW-"):
-                symbol = m["market"].replace("KRW-", "")
-                name2symbol[m["korean_name"]] = symbol
-                name2symbol[symbol] = m["korean_name"]
-        return name2symbol
-    except Exception as e:
-        print(f"Upbit Symbol Map Error: {e}")
-        return {}
-
-UPBIT_MAP = get_upbit_symbol_map()
-
-def get_symbol_by_korean_name_krw_btc(name):
-    # KRW마켓 → 없으면 BTC마켓도 추가 탐색
-    try:
-        url = "https://api.upbit.com/v1/market/all"
-        r = requests.get(url, timeout=3)
-        if r.status_code != 200:
-            return None, None  # 심볼, 마켓
-        markets = r.json()
-        krw_symbol = None
-        btc_symbol = None
-        for m in markets:
-            if m["korean_name"] == name:
-                if m["market"].startswith("KRW-"):
-                    krw_symbol = m["market"].replace("KRW-", "")
-                elif m["market"].startswith("BTC-"):
-                    btc_symbol = m["market"].replace("BTC-", "")
-        if krw_symbol:
-            return krw_symbol, "KRW"
-        if btc_symbol:
-            return btc_symbol, "BTC"
-        return None, None
-    except Exception as e:
-        return None, None
+# 업비트 마켓 카탈로그 (한글명/영문명/심볼 → KRW·BTC 마켓), 첫 목록부터 백그라운드에서 받는다
+UPBIT_CATALOG.start(block=False)
+# KOSPI/KOSDAQ 종목명 → 종목코드 로컬 인덱스
+STOCK_INDEX.start(block=False, hold=STARTUP.settled)
 
-def get_cmc_price_and_change(symbol, convert="KRW"):
+@instrument("cmc", error_of=error_at(2))
+def fetch_cmc_price_and_change(symbol, convert="KRW"):
     url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest"
     headers = {
         "Accepts": "application/json",
@@ -67,7 +47,7 @@ def get_cmc_price_and_change(symbol, convert="KRW"):
         "convert": convert
     }
     try:
-        r = requests.get(url, headers=headers, params=params, timeout=5)
+        r = http_get(url, headers=headers, params=params)
         if r.status_code != 200:
             return None, None, f"CMC API 접속 실패 (status:{r.status_code})", None
         data = r.json()
@@ -78,44 +58,223 @@ def get_cmc_price_and_change(symbol, convert="KRW"):
     except Exception as e:
         return None, None, f"CMC API 에러: {e}", None
 
-def get_upbit_price_and_change(symbol, market="KRW"):
+@instrument("upbit", error_of=error_at(2))
+def fetch_upbit_price_and_change(symbol, market="KRW"):
     try:
         m = market.upper()
-        r = requests.get(f"https://api.upbit.com/v1/ticker?markets={m}-{symbol.upper()}", timeout=3)
+        r = http_get(f"https://api.upbit.com/v1/ticker?markets={m}-{symbol.upper()}")
         if r.status_code != 200:
             return None, None, f"Upbit API 접속 실패 (status:{r.status_code})"
         data = r.json()[0]
         price = float(data["trade_price"])
         change = float(data.get("signed_change_rate", 0)) * 100
+        if m == "KRW":
+            QUOTE_HISTORY.record("upbit", symbol, price)
         return price, change, None
     except Exception as e:
         return None, None, f"Upbit 시세 에러: {e}"
 
-def get_bithumb_price_and_change(symbol):
+@instrument("bithumb", error_of=error_at(2))
+def fetch_bithumb_price_and_change(symbol):
     try:
-        r = requests.get(f"https://api.bithumb.com/public/ticker/{symbol.upper()}_KRW", timeout=5)
+        r = http_get(f"https://api.bithumb.com/public/ticker/{symbol.upper()}_KRW")
         if r.status_code != 200:
             return None, None, f"Bithumb API 접속 실패 (status:{r.status_code})"
         data = r.json()
         if data["status"] == "0000":
             price = int(float(data["data"]["closing_price"]))
             change = float(data["data"].get("fluctate_rate_24H", 0))
+            QUOTE_HISTORY.record("bithumb", symbol, price)
             return price, change, None
         else:
             return None, None, f"Bithumb 데이터 없음"
     except Exception as e:
         return None, None, f"Bithumb 시세 에러: {e}"
 
-def get_exchange_rate():
+NAVER_FX_URL = "https://search.naver.com/p/csearch/content/qapirender.nhn?key=calculator&pkid=141&q=환율&where=m&u1=keb&u3=USD&u4=KRW&u2=1"
+ER_API_FX_URL = "https://open.er-api.com/v6/latest/USD"
+# 두 환율 소스가 모두 실패했을 때만 쓰는 값
+FALLBACK_KRW_USD = 1400.0
+
+@instrument("fx_naver", error_of=error_at(1))
+def fetch_naver_exchange_rate():
     try:
-        url = "https://search.naver.com/p/csearch/content/qapirender.nhn?key=calculator&pkid=141&q=환율&where=m&u1=keb&u3=USD&u4=KRW&u2=1"
-        r = requests.get(url, timeout=5)
+        r = http_get(NAVER_FX_URL)
         if r.status_code != 200:
-            return 1400.0, f"환율 API 접속 실패 (status:{r.status_code})"
+            return None, f"환율 API 접속 실패 (status:{r.status_code})"
         data = r.json()
         return float(data["country"][1]["value"].replace(",", "")), None
     except Exception as e:
-        return 1400.0, f"환율 API 에러: {e}"
+        return None, f"환율 API 에러: {e}"
+
+@instrument("fx_er_api", error_of=error_at(1))
+def fetch_er_api_exchange_rate():
+    try:
+        r = http_get(ER_API_FX_URL)
+        if r.status_code != 200:
+            return None, f"보조 환율 API 접속 실패 (status:{r.status_code})"
+        data = r.json()
+        if data.get("result") != "success":
+            return None, f"보조 환율 API 에러: {data.get('error-type')}"
+        return float(data["rates"]["KRW"]), None
+    except Exception as e:
+        return None, f"보조 환율 API 에러: {e}"
+
+def fallback_exchange_rate(err):
+    """환율을 못 받았을 때 계산에 쓸 (FALLBACK_KRW_USD, 기본값 사용 안내가 붙은 에러)"""
+    return FALLBACK_KRW_USD, f"{err} (기본값 {FALLBACK_KRW_USD:,.0f}원 사용)"
+
+def fetch_exchange_rate():
+    """
+    네이버 환율 우선. 평소 응답 시간(백분위수)보다 늦거나 실패하면 open.er-api.com 에도 요청해 먼저 온 값을 쓴다.
+    둘 다 실패하면 FALLBACK_KRW_USD와 에러 메시지
+    """
+    rate, err = hedged("fx", fetch_naver_exchange_rate, fetch_er_api_exchange_rate,
+                       hedge_delay(NAVER_FX_URL), ok=lambda v: v[1] is None)
+    if rate is None:
+        return fallback_exchange_rate(err)
+    return rate, None
+
+@instrument("cmc")
+def fetch_cmc_quotes(symbols, convert="USD"):
+    """여러 심볼을 CMC 한 번의 호출로 조회 → {심볼: (가격, 24h 변동률, 에러, 남은 호출수)}"""
+    url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest"
+    headers = {
+        "Accepts": "application/json",
+        "X-CMC_PRO_API_KEY": CMC_API_KEY,
+    }
+    params = {
+        "symbol": ",".join(s.upper() for s in symbols),
+        "convert": convert,
+        "skip_invalid": "true",
+    }
+    r = http_get(url, headers=headers, params=params)
+    if r.status_code != 200:
+        raise RuntimeError(f"CMC API 접속 실패 (status:{r.status_code})")
+    remaining = r.headers.get("X-RateLimit-Remaining")
+    quotes = {}
+    for symbol, item in r.json().get("data", {}).items():
+        quote = item["quote"][convert]
+        quotes[symbol] = (quote["price"], quote["percent_change_24h"], None, remaining)
+    return quotes
+
+@instrument("upbit")
+def fetch_upbit_tickers(symbols, market="KRW"):
+    """여러 마켓을 업비트 한 번의 호출로 조회 → {심볼: (가격, 변동률, 에러)}"""
+    m = market.upper()
+    markets = ",".join(f"{m}-{s.upper()}" for s in symbols)
+    r = http_get(f"https://api.upbit.com/v1/ticker?markets={markets}")
+    if r.status_code != 200:
+        raise RuntimeError(f"Upbit API 접속 실패 (status:{r.status_code})")
+    tickers = {}
+    for data in r.json():
+        symbol = data["market"].split("-", 1)[1]
+        tickers[symbol] = (float(data["trade_price"]), float(data.get("signed_change_rate", 0)) * 100, None)
+    if m == "KRW":
+        QUOTE_HISTORY.record_many("upbit", {s: t[0] for s, t in tickers.items()})
+    return tickers
+
+@instrument("bithumb")
+def fetch_bithumb_tickers(symbols):
+    """빗썸 ALL_KRW 한 번의 호출로 여러 심볼 조회 → {심볼: (가격, 변동률, 에러)}"""
+    r = http_get("https://api.bithumb.com/public/ticker/ALL_KRW")
+    if r.status_code != 200:
+        raise RuntimeError(f"Bithumb API 접속 실패 (status:{r.status_code})")
+    data = r.json()
+    if data.get("status") != "0000":
+        raise RuntimeError("Bithumb 데이터 없음")
+    tickers = {}
+    for symbol in symbols:
+        item = data["data"].get(symbol.upper())
+        if isinstance(item, dict):
+            tickers[symbol.upper()] = (int(float(item["closing_price"])), float(item.get("fluctate_rate_24H", 0)), None)
+    QUOTE_HISTORY.record_many("bithumb", {s: t[0] for s, t in tickers.items()})
+    return tickers
+
+def fetch_bithumb_symbols():
+    """빗썸 KRW 마켓 심볼 목록 (실시간 스트림 구독용)"""
+    try:
+        r = http_get("https://api.bithumb.com/public/ticker/ALL_KRW")
+        data = r.json().get("data", {})
+        return [symbol for symbol, item in data.items() if isinstance(item, dict)]
+    except Exception as e:
+        print(f"Bithumb Symbol List Error: {e}")
+        return []
+
+# 업비트/빗썸 WebSocket 실시간 시세 (선택 기능)
+if os.environ.get("TICKER_STREAM") == "1":
+    TICKER_STREAMS.start(UPBIT_CATALOG.krw_symbols, fetch_bithumb_symbols, on_update=QUOTE_HISTORY.record)
+
+# --- 시세 캐시 (소스, 심볼, 마켓) ---
+
+def get_cmc_price_and_change(symbol, convert="KRW"):
+    return QUOTE_CACHE.get("cmc", symbol.upper(), convert,
+                           lambda: fetch_cmc_price_and_change(symbol, convert),
+                           valid=lambda v: v[2] is None)
+
+def get_upbit_price_and_change(symbol, market="KRW"):
+    if market.upper() == "KRW":
+        streamed = TICKER_STREAMS.upbit_price(symbol)
+        if streamed:
+            return streamed[0], streamed[1], None
+    return QUOTE_CACHE.get("upbit", symbol.upper(), market.upper(),
+                           lambda: fetch_upbit_price_and_change(symbol, market),
+                           valid=lambda v: v[2] is None)
+
+def get_bithumb_price_and_change(symbol):
+    streamed = TICKER_STREAMS.bithumb_price(symbol)
+    if streamed:
+        return streamed[0], streamed[1], None
+    return QUOTE_CACHE.get("bithumb", symbol.upper(), "KRW",
+                           lambda: fetch_bithumb_price_and_change(symbol),
+                           valid=lambda v: v[2] is None)
+
+def get_exchange_rate():
+    return QUOTE_CACHE.get("fx", "USD", "KRW", fetch_exchange_rate,
+                           valid=lambda v: v[1] is None)
+
+def get_cmc_quotes(symbols, convert="USD"):
+    return QUOTE_CACHE.get_many("cmc", [s.upper() for s in symbols], convert,
+                                lambda missing: fetch_cmc_quotes(missing, convert))
+
+def streamed_tickers(symbols, lookup):
+    """실시간 스트림에 있는 심볼은 바로 채우고, 나머지 심볼 목록을 함께 반환"""
+    found = {}
+    rest = []
+    for symbol in symbols:
+        streamed = lookup(symbol)
+        if streamed:
+            found[symbol] = (streamed[0], streamed[1], None)
+        else:
+            rest.append(symbol)
+    return found, rest
+
+def get_upbit_tickers(symbols, market="KRW"):
+    symbols = [s.upper() for s in symbols]
+    found, rest = streamed_tickers(symbols, TICKER_STREAMS.upbit_price) if market.upper() == "KRW" else ({}, symbols)
+    if rest:
+        found.update(QUOTE_CACHE.get_many("upbit", rest, market.upper(),
+                                          lambda missing: fetch_upbit_tickers(missing, market)))
+    return found
+
+def get_bithumb_tickers(symbols):
+    found, rest = streamed_tickers([s.upper() for s in symbols], TICKER_STREAMS.bithumb_price)
+    if rest:
+        found.update(QUOTE_CACHE.get_many("bithumb", rest, "KRW", fetch_bithumb_tickers))
+    return found
+
+def with_josa_ro(name):
+    """'비트코인' → '비트코인으로', '리플' → '리플로'"""
+    last = name[-1:]
+    if "가" <= last <= "힣" and (ord(last) - 0xAC00) % 28 not in (0, 8):
+        return f"{name}으로"
+    return f"{name}로"
+
+def guess_note(query, name):
+    """정확히 일치하는 코인이 없어 앞부분/유사 이름으로 찾았으면 그 사실을 알리는 문구, 아니면 빈 문자열"""
+    if not name or query.isascii() or UPBIT_CATALOG.is_exact(query):
+        return ""
+    return f"{query} → {with_josa_ro(name)} 찾음"
 
 def get_coin_price(query):
     try:
@@ -126,38 +285,52 @@ def get_coin_price(query):
         error_msgs = []
 
         upbit_market_type = "KRW"
-        if is_korean:
-            symbol, upbit_market_type = get_symbol_by_korean_name_krw_btc(query)
-            if not symbol:
-                return f"[{query}] 코인없음 (업비트에 미상장)"
-        else:
-            symbol = symbol.upper()
+        guessed = ""
+        found_symbol, found_market, found_name = UPBIT_CATALOG.resolve(query)
+        if found_symbol:
+            symbol, upbit_market_type, kr_name = found_symbol, found_market, found_name
+            guessed = guess_note(query, found_name)
+        elif is_korean:
+            return f"[{query}] 코인없음 (업비트에 미상장)"
+
+        # 환율 / 글로벌 / 업비트 / 빗썸 시세를 동시에 조회
+        calls = {
+            "환율": (get_exchange_rate,),
+            "글로벌가격": (get_cmc_price_and_change, symbol, "USD"),
+            "빗썸": (get_bithumb_price_and_change, symbol),
+        }
+        if upbit_market_type == "KRW":
+            calls["업비트"] = (get_upbit_price_and_change, symbol, "KRW")
+        elif upbit_market_type == "BTC":
+            # BTC마켓 가격을 KRW로 환산
+            calls["업비트BTC"] = (get_upbit_price_and_change, "BTC", "KRW")
+            calls["업비트"] = (get_upbit_price_and_change, symbol, "BTC")
+        results, failed = fan_out(calls)
 
-        # 환율
-        krw_usd, ex_err = get_exchange_rate()
+        krw_usd, ex_err = results["환율"] if "환율" in results else fallback_exchange_rate(failed.get("환율"))
         if ex_err:
             error_msgs.append(f"환율: {ex_err}")
 
         # 글로벌(달러) 가격
-        global_price, global_change, err1, cmc_remaining = get_cmc_price_and_change(symbol, convert="USD")
+        global_price, global_change, err1, cmc_remaining = results.get("글로벌가격", (None, None, failed.get("글로벌가격"), None))
         upbit = None
         upbit_change = None
         # 업비트 가격 (마켓 타입 따라 다르게)
         if upbit_market_type == "KRW":
-            upbit, upbit_change, err2 = get_upbit_price_and_change(symbol, "KRW")
+            upbit, upbit_change, err2 = results.get("업비트", (None, None, failed.get("업비트")))
         elif upbit_market_type == "BTC":
-            # BTC마켓 가격을 KRW로 환산
-            btc_price, _, _ = get_upbit_price_and_change("BTC", "KRW")
-            coin_btc, upbit_change, err2 = get_upbit_price_and_change(symbol, "BTC")
+            btc_price, _, _ = results.get("업비트BTC", (None, None, None))
+            coin_btc, upbit_change, err2 = results.get("업비트", (None, None, failed.get("업비트")))
             if coin_btc and btc_price:
                 upbit = int(coin_btc * btc_price)
             else:
                 upbit = None
+                err2 = err2 or failed.get("업비트BTC")
         else:
             upbit = None
             err2 = "업비트 가격 없음"
 
-        bithumb, bithumb_change, err3 = get_bithumb_price_and_change(symbol)
+        bithumb, bithumb_change, err3 = results.get("빗썸", (None, None, failed.get("빗썸")))
 
         if err1: error_msgs.append(f"글로벌가격: {err1}")
         if upbit is None: error_msgs.append(f"업비트: {err2}")
@@ -167,9 +340,11 @@ def get_coin_price(query):
         if global_price:
             global_str = f"${global_price:,.2f}"
             global_rate = f" ({global_change:+.2f}%)"
-            if upbit:
-                kimchi = ((upbit - global_price * krw_usd) / (global_price * krw_usd)) * 100
-                kimchi_str = f"{kimchi:+.2f}%"
+            # 업비트 가격이 없으면 빗썸 가격으로 대신 계산
+            domestic = upbit or bithumb
+            if domestic:
+                kimchi = ((domestic - global_price * krw_usd) / (global_price * krw_usd)) * 100
+                kimchi_str = f"{kimchi:+.2f}%" + ("" if upbit else " (빗썸 기준)")
             else:
                 kimchi_str = "계산불가"
         else:
@@ -177,7 +352,7 @@ def get_coin_price(query):
             global_rate = ""
             kimchi_str = "계산불가"
 
-        result = f"""[{symbol}] {kr_name} 시세
+        result = (f"🔎 {guessed}\n\n" if guessed else "") + f"""[{symbol}] {kr_name} 시세
 
 💰 글로벌 가격 \n → {global_str}{global_rate} \n
 🇰🇷 국내 거래소 가격
@@ -193,242 +368,583 @@ def get_coin_price(query):
     except Exception as e:
         return f"코인 시세 조회 중 오류 발생: {e}"
 
+def get_coin_prices(queries):
+    """
+    여러 코인(!BTC,ETH,SOL)을 한 응답으로. 소스별로 한 번씩만 호출한다.
+    """
+    try:
+        coins = []  # (심볼, 업비트 마켓, 이름)
+        seen = set()  # 'BTC,비트코인'처럼 같은 코인을 다른 이름으로 적어도 한 번만
+        not_found = []
+        guesses = []
+        for query in queries:
+            symbol, market, name = UPBIT_CATALOG.resolve(query)
+            if not symbol and not query.isascii():
+                not_found.append(query)
+                continue
+            if not symbol:
+                symbol, market, name = query.upper(), None, query.upper()
+            if symbol in seen:
+                continue
+            seen.add(symbol)
+            coins.append((symbol, market, name))
+            note = guess_note(query, name)
+            if note:
+                guesses.append(note)
+        if not coins:
+            return f"[{', '.join(not_found)}] 코인없음 (업비트에 미상장)"
+
+        symbols = [c[0] for c in coins]
+        krw_symbols = [c[0] for c in coins if c[1] == "KRW"]
+        btc_symbols = [c[0] for c in coins if c[1] == "BTC"]
+        if btc_symbols and "BTC" not in krw_symbols:
+            krw_symbols.append("BTC")
+        calls = {
+            "환율": (get_exchange_rate,),
+            "글로벌가격": (get_cmc_quotes, symbols, "USD"),
+            "빗썸": (get_bithumb_tickers, symbols),
+        }
+        if krw_symbols:
+            calls["업비트"] = (get_upbit_tickers, krw_symbols, "KRW")
+        if btc_symbols:
+            calls["업비트BTC"] = (get_upbit_tickers, btc_symbols, "BTC")
+        results, failed = fan_out(calls)
+
+        krw_usd, ex_err = results["환율"] if "환율" in results else fallback_exchange_rate(failed.get("환율"))
+        cmc = results.get("글로벌가격", {})
+        upbit_krw = results.get("업비트", {})
+        upbit_btc = results.get("업비트BTC", {})
+        bithumb = results.get("빗썸", {})
+        error_msgs = [f"{name}: {err}" for name, err in failed.items() if name != "환율"]
+        if ex_err:
+            error_msgs.append(f"환율: {ex_err}")
+
+        lines = []
+        for symbol, market, name in coins:
+            global_price = cmc.get(symbol, (None,))[0]
+            upbit, upbit_change = None, None
+            if market == "KRW" and symbol in upbit_krw:
+                upbit, upbit_change, _ = upbit_krw[symbol]
+            elif market == "BTC" and symbol in upbit_btc and "BTC" in upbit_krw:
+                coin_btc, upbit_change, _ = upbit_btc[symbol]
+                upbit = int(coin_btc * upbit_krw["BTC"][0])
+            bithumb_price = bithumb.get(symbol, (None,))[0]
+
+            parts = [f"${global_price:,.2f}" if global_price else "글로벌 정보 없음"]
+            if upbit:
+                parts.append(f"업비트 ₩{upbit:,} ({upbit_change:+.2f}%)")
+            if bithumb_price:
+                parts.append(f"빗썸 ₩{bithumb_price:,}")
+            domestic = upbit or bithumb_price
+            if global_price and domestic:
+                kimchi = ((domestic - global_price * krw_usd) / (global_price * krw_usd)) * 100
+                parts.append(f"김프 {kimchi:+.2f}%" + ("" if upbit else "(빗썸)"))
+            lines.append(f"[{symbol}] {name}\n → " + " | ".join(parts))
+
+        result = "🪙 코인 시세\n\n" + "\n".join(lines)
+        if guesses:
+            result += "\n\n🔎 " + ", ".join(guesses)
+        if not_found:
+            result += f"\n\n코인없음 (업비트에 미상장): {', '.join(not_found)}"
+        if error_msgs:
+            result += "\n\n[접근 실패 정보]\n" + "\n".join(error_msgs)
+        return result
+    except Exception as e:
+        return f"코인 시세 조회 중 오류 발생: {e}"
+
+@instrument("naver_search", error_of=lambda r: None if r[0] else "not found")
 def get_stock_code_from_naver(name):
     """
-    네이버 웹 검색을 통해 종목명 → 종목코드 추출 (m.stock.naver.com 대체용)
+    네이버 웹 검색을 통해 종목명 → 종목코드 추출 (로컬 종목 인덱스에 없을 때만 사용)
     """
     try:
-        url = f"https://finance.naver.com/search/search.naver?query={name}"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(r.text, "html.parser")
-        link = soup.select_one("a[href*='/item/main.nhn?code=']")
-        if not link:
-            return None, None
-        href = link["href"]
-        code = href.split("code=")[-1]
-        stock_name = link.text.strip()
-        return code, stock_name
+        r = http_get("https://finance.naver.com/search/search.naver", params={"query": name})
+        return naver_scrape.parse_search_link(r.content)
     except Exception as e:
-        return None, None     
-        
+        return None, None
+
+@instrument("naver_stock")
+def fetch_korean_stock_quote(code):
+    """
+    네이버 금융 종목 페이지에서 (현재가, 등락률, 부호, 거래량) 크롤링
+    태그를 찾지 못하면 None
+    """
+    r = http_get(f"https://finance.naver.com/item/main.nhn?code={code}")
+    quote = naver_scrape.parse_stock_quote(r.content)
+    if quote:
+        QUOTE_HISTORY.record("krx", code, quote[0])
+    return quote
+
+def get_stock_code(name):
+    """
+    로컬 종목 인덱스에서 정확히 일치 → 네이버 검색(찾으면 인덱스에 추가) → 인덱스 초성/앞부분 일치 순.
+    초성 입력은 네이버 검색이 안 되므로 바로 인덱스에서 찾는다
+    """
+    code, stock_name = STOCK_INDEX.resolve(name, guess=False)
+    if code:
+        return code, stock_name
+    if not is_choseong_query(normalize_name(name)):
+        code, stock_name = QUOTE_CACHE.get("naver_search", name, "KRX",
+                                           lambda: get_stock_code_from_naver(name),
+                                           valid=lambda v: v[0] is not None)
+        if code:
+            STOCK_INDEX.learn(code, stock_name)
+            return code, stock_name
+    return STOCK_INDEX.resolve(name)
+
+def stock_guess_note(query, name):
+    """입력과 다른 이름의 종목으로 찾았으면 그 사실을 알리는 문구, 아니면 빈 문자열"""
+    if not name or query.isdigit() or STOCK_INDEX.is_exact(query) or normalize_name(query) == normalize_name(name):
+        return ""
+    return f"{query} → {with_josa_ro(name)} 찾음"
+
+def get_korean_stock_quote(code):
+    return QUOTE_CACHE.get("naver_stock", code, "KRX",
+                           lambda: fetch_korean_stock_quote(code),
+                           valid=lambda v: v is not None)
+
 def get_korean_stock_price(query):
     """
     종목명을 입력받아 종목코드 조회 후,
     네이버 금융에서 현재가, 등락률, 거래량 크롤링하여 출력
     """
     try:
-        code, stock_name = (query.zfill(6), query) if query.isdigit() else get_stock_code_from_naver(query)
+        code, stock_name = (query.zfill(6), query) if query.isdigit() else get_stock_code(query)
         if not code:
             return f"{query}: 종목코드를 찾을 수 없습니다."
 
-        url = f"https://finance.naver.com/item/main.nhn?code={code}"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        price_tag = soup.select_one("p.no_today span.blind")
-        change_tag = soup.select_one("p.no_exday span.blind")
-        change_sign_tag = soup.select_one("p.no_exday span:nth-of-type(2)")
-        volume_tag = soup.select("td.first span.blind")
-
-        if not price_tag or not change_tag or not volume_tag:
+        quote = get_korean_stock_quote(code)
+        if not quote:
             return f"{stock_name}: 시세 정보 크롤링 실패"
+        price, change, sign, volume = quote
+        guessed = stock_guess_note(query, stock_name)
 
-        price = int(price_tag.text.replace(",", ""))
-        change = float(change_tag.text.replace(",", ""))
-        sign = "+" if "up" in change_sign_tag.get("class", []) else "-"
-        volume = int(volume_tag[1].text.replace(",", "")) if len(volume_tag) > 1 else 0
-
-        return (f"[{stock_name}] 주식 시세\n"
+        return ((f"🔎 {guessed}\n\n" if guessed else "") +
+                f"[{stock_name}] 주식 시세\n"
                 f"💰 현재 가격 → ₩{price:,} ({sign}{abs(change):.2f}%)\n"
                 f"📊 거래량 → {volume:,}주")
     except Exception as e:
         return f"한국 주식 정보를 가져올 수 없습니다. 원인: {e}"
-        
+
+def fetch_us_stock_quote(ticker):
+    quote = fetch_fast_quote(ticker)
+    if quote is not None and quote.is_valid():
+        QUOTE_HISTORY.record("us", ticker, quote.price)
+    return quote
+
+def get_us_stock_quote(ticker):
+    return QUOTE_CACHE.get("yahoo", ticker.upper(), "US",
+                           lambda: fetch_us_stock_quote(ticker.upper()),
+                           valid=lambda q: q is not None and q.is_valid())
+
 def get_us_stock_price(ticker):
     try:
-        stock = yf.Ticker(ticker)
-        price = stock.info["regularMarketPrice"]
-        prev = stock.info.get("regularMarketPreviousClose", 0)
-        volume = stock.info.get("volume", 0)
-        if price is None or prev is None:
+        quote = get_us_stock_quote(ticker)
+        if quote is None or not quote.is_valid():
             return f"{ticker}: 시세/변동률 정보 없음"
-        change = ((price - prev) / prev * 100) if prev else 0
+        change = quote.change_pct
         sign = "+" if change >= 0 else ""
-        return f"[{ticker}] 주식 시세\n💰 현재 가격 → ${price:,} ({sign}{change:.2f}%)\n📊 거래량 → {volume:,}주"
+        return f"[{ticker}] 주식 시세\n💰 현재 가격 → ${quote.price:,} ({sign}{change:.2f}%)\n📊 거래량 → {quote.volume:,}주"
     except Exception as e:
         return f"미국 주식 정보를 가져올 수 없습니다. 원인: {e}"
 
-def get_korea_ranking(rise=True):
+@instrument("yahoo_download")
+def fetch_yahoo_quotes(tickers):
     """
-    네이버 금융 HTML 기반 상승률/하락률 TOP20 크롤링 (카카오 응답 길이 제한 대응)
+    yf.download 한 번으로 여러 티커의 일봉을 받아 {티커: FastQuote}
+    데이터가 없는 티커는 결과에서 빠진다
+    """
+    import yfinance as yf
+
+    data = yf.download(tickers, period="5d", interval="1d", group_by="ticker",
+                       auto_adjust=False, progress=False, threads=True)
+    quotes = {}
+    for ticker in tickers:
+        try:
+            if data.columns.nlevels > 1:
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            bars = frame.dropna(subset=["Close"])
+            if len(bars) < 2:
+                continue
+            volume = int(bars["Volume"].iloc[-1]) if "Volume" in bars else 0
+            quotes[ticker] = FastQuote(ticker, float(bars["Close"].iloc[-1]), float(bars["Close"].iloc[-2]), volume)
+        except Exception as e:
+            print(f"Yahoo Batch Quote Error {ticker}: {e}")
+    QUOTE_HISTORY.record_many("us", {t: q.price for t, q in quotes.items()})
+    return quotes
+
+def get_yahoo_quotes(tickers):
     """
+    여러 티커를 한 번의 일괄 요청으로 조회. 일괄 결과에 없는 티커만 개별 조회로 보충
+    """
+    tickers = [t.upper() for t in tickers]
+    quotes = QUOTE_CACHE.get_many("yahoo", tickers, "US", fetch_yahoo_quotes,
+                                  valid=lambda q: q is not None and q.is_valid())
+    missing = [t for t in tickers if t not in quotes]
+    if missing:
+        results, _ = fan_out({t: (get_us_stock_quote, t) for t in missing})
+        quotes.update((t, q) for t, q in results.items() if q is not None and q.is_valid())
+    return quotes
+
+def get_us_stock_prices(tickers):
+    """여러 미국 주식(#AAPL,TSLA,NVDA)을 한 응답으로"""
     try:
-        url = "https://finance.naver.com/sise/sise_rise.naver" if rise else "https://finance.naver.com/sise/sise_fall.naver"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        rows = soup.select("table.type_2 tr")[2:]  # 헤더 제외
-        results = []
-
-        for row in rows:
-            cols = row.select("td")
-            if len(cols) < 6:
+        quotes = get_yahoo_quotes(tickers)
+        lines = []
+        for ticker in tickers:
+            quote = quotes.get(ticker.upper())
+            if quote is None:
+                lines.append(f"[{ticker.upper()}] 시세/변동률 정보 없음")
                 continue
-            name = cols[1].text.strip()
-            rate = cols[5].text.strip()
-            code_tag = cols[1].select_one("a")
-            code = code_tag["href"].split("code=")[-1] if code_tag else "Unknown"
-            results.append(f"{len(results)+1}. {name} ({code}) {rate}")
-            if len(results) >= 20:  # TOP20 제한
-                break
+            lines.append(f"[{ticker.upper()}] ${quote.price:,.2f} ({quote.change_pct:+.2f}%) | 거래량 {quote.volume:,}주")
+        return "🇺🇸 미국 주식 시세\n\n" + "\n".join(lines)
+    except Exception as e:
+        return f"미국 주식 정보를 가져올 수 없습니다. 원인: {e}"
 
-        header = "📈 한국주식 상승률 TOP20" if rise else "📉 한국주식 하락률 TOP20"
-        return f"{header}\n\n" + "\n".join(results)
+@instrument("naver_ranking")
+def fetch_korea_ranking(rise=True):
+    """
+    네이버 금융 HTML 기반 상승률/하락률 TOP20 크롤링 (카카오 응답 길이 제한 대응)
+    """
+    url = "https://finance.naver.com/sise/sise_rise.naver" if rise else "https://finance.naver.com/sise/sise_fall.naver"
+    r = http_get(url)
+    rows = naver_scrape.parse_ranking(r.content, limit=20)  # TOP20 제한
+    results = [f"{i+1}. {name} ({code}) {rate}" for i, (name, code, rate) in enumerate(rows)]
+    if not results:
+        raise RuntimeError("순위 표를 찾지 못했습니다")
+
+    header = "📈 한국주식 상승률 TOP20" if rise else "📉 한국주식 하락률 TOP20"
+    return f"{header}\n\n" + "\n".join(results)
+
+@instrument("yahoo_screener")
+def fetch_us_ranking(rise=True):
+    suffix = "day_gainers" if rise else "day_losers"
+    headers = {"Accept-Language": "en-US,en;q=0.9"}
+    screener_url = f"https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved?count=30&scrIds={suffix}"
+    resp = http_get(screener_url, headers=headers)
+    if resp.status_code != 200:
+        raise RuntimeError(f"야후파이낸스 정보 접속 실패 (status:{resp.status_code})")
+    js = resp.json()
+    items = js["finance"]["result"][0]["quotes"]
+    top = []
+    for idx, item in enumerate(items):
+        symbol = item.get("symbol", "")
+        name = item.get("shortName", "") or item.get("longName", "")
+        rate = item.get("regularMarketChangePercent", 0)
+        sign = "+" if rate >= 0 else ""
+        top.append(f"{idx+1}. {name} ({symbol}) {sign}{rate:.2f}%")
+    if not top:
+        raise RuntimeError("순위 데이터 없음")
+    return ("미국주식 상승률\n" if rise else "미국주식 하락률\n") + "\n".join(top)
+
+# 순위는 스냅샷 작업이 장중/장외 주기에 맞춰 미리 만들어 둔다
+RANKINGS.register(("korea", True), lambda: fetch_korea_ranking(rise=True), "KRX")
+RANKINGS.register(("korea", False), lambda: fetch_korea_ranking(rise=False), "KRX")
+RANKINGS.register(("us", True), lambda: fetch_us_ranking(rise=True), "US")
+RANKINGS.register(("us", False), lambda: fetch_us_ranking(rise=False), "US")
 
+def get_korea_ranking(rise=True):
+    try:
+        return RANKINGS.get(("korea", rise))
     except Exception as e:
         return f"한국주식 {'상승률' if rise else '하락률'} 정보를 불러오지 못했습니다. 원인: {e}"
-        
+
 def get_us_ranking(rise=True):
     try:
-        suffix = "day_gainers" if rise else "day_losers"
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        screener_url = f"https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved?count=30&scrIds={suffix}"
-        resp = requests.get(screener_url, headers=headers, timeout=3)
-        if resp.status_code != 200:
-            return f"야후파이낸스 정보 접속 실패 (status:{resp.status_code})"
-        js = resp.json()
-        items = js["finance"]["result"][0]["quotes"]
-        top = []
-        for idx, item in enumerate(items):
-            symbol = item.get("symbol", "")
-            name = item.get("shortName", "") or item.get("longName", "")
-            rate = item.get("regularMarketChangePercent", 0)
-            sign = "+" if rate >= 0 else ""
-            top.append(f"{idx+1}. {name} ({symbol}) {sign}{rate:.2f}%")
-        if not top:
-            return "미국주식 정보를 불러오지 못했습니다."
-        return ("미국주식 상승률\n" if rise else "미국주식 하락률\n") + "\n".join(top)
+        return RANKINGS.get(("us", rise))
     except Exception as e:
         return f"미국주식 정보를 불러오지 못했습니다. 원인: {e}"
 
+def get_cmc_listings():
+    # listings는 크레딧을 더 쓰므로 보드보다 길게 캐시
+    return QUOTE_CACHE.get("cmc_listings", "ALL", "USD", lambda: fetch_cmc_frame(CMC_API_KEY))
+
+KIMCHI_BOARD = KimchiBoard(UPBIT_CATALOG.krw_symbols, get_exchange_rate, get_cmc_listings)
+
+def get_kimchi_board():
+    """업비트/빗썸 전 종목 김치 프리미엄 보드"""
+    try:
+        board = QUOTE_CACHE.get("kimchi", "ALL", "KRW", KIMCHI_BOARD.build)
+        return board.reply
+    except Exception as e:
+        return f"김치 프리미엄 정보를 불러오지 못했습니다. 원인: {e}"
+
 def get_help():
     return (
         "📌 사용 가능한 명령어 목록\n\n"
         "✔️ 코인 시세: !비트코인 / !BTC / !이더리움 등\n"
         "✔️ 한국 주식: @삼성전자\n"
         "✔️ 미국 주식: #TSLA\n"
+        "✔️ 여러 종목 한번에: !BTC,ETH,SOL / #AAPL,TSLA,NVDA\n"
         "✔️ 한국 주식 상승률: /한국주식 상승률\n"
         "✔️ 한국 주식 하락률: /한국주식 하락률\n"
         "✔️ 미국 주식 상승률: /미국주식 상승률\n"
         "✔️ 미국 주식 하락률: /미국주식 하락률\n"
         "✔️ 주요 금융시장 지수: /지수\n"
+        "✔️ 김치 프리미엄 보드: /김프\n"
+        "✔️ 최근 변동(기록 기준): /변동 !BTC 1h / /변동 @삼성전자 30m\n"
         "✔️ 명령어 안내: /명령어"
     )
 
-def get_market_indices():
-    results = []
+MARKET_INDICES = [
+    ("🇰🇷 한국", {"코스피": "^KS11", "코스닥": "^KQ11"}),
+    ("🇺🇸 미국", {"다우존스": "^DJI", "나스닥": "^IXIC", "S&P500": "^GSPC", "나스닥선물": "NQ=F"}),
+    ("🇯🇵 일본", {"니케이225": "^N225"}),
+    ("🇨🇳 중국", {"상해종합": "000001.SS"}),
+]
 
-    # --- 한국: 코스피/코스닥 (야후파이낸스) ---
+def get_market_indices():
     try:
-        indices = {
-            "코스피": "^KS11",
-            "코스닥": "^KQ11",
-        }
-        kr_lines = []
-        for name, ticker in indices.items():
-            stock = yf.Ticker(ticker)
-            price = stock.info.get("regularMarketPrice")
-            change = stock.info.get("regularMarketChangePercent")
-            sign = "+" if change is not None and change >= 0 else ""
-            if price is not None and change is not None:
-                kr_lines.append(f"- {name}: {price:,} ({sign}{change:.2f}%)")
-            else:
-                kr_lines.append(f"- {name}: 정보없음")
-        results.append("🇰🇷 한국\n" + "\n".join(kr_lines))
-    except Exception:
-        results.append("🇰🇷 한국\n- 코스피/코스닥 정보를 불러올 수 없습니다.")
+        tickers = [ticker for _, indices in MARKET_INDICES for ticker in indices.values()]
+        quotes = get_yahoo_quotes(tickers)
+    except Exception as e:
+        print(f"Market Indices Error: {e}")
+        quotes = {}
 
-    # --- 미국 주요지수/선물 ---
-    try:
-        indices = {
-            "다우존스": "^DJI",
-            "나스닥": "^IXIC",
-            "S&P500": "^GSPC",
-            "나스닥선물": "NQ=F",
-        }
-        us_lines = []
+    results = []
+    for region, indices in MARKET_INDICES:
+        lines = []
         for name, ticker in indices.items():
-            stock = yf.Ticker(ticker)
-            price = stock.info.get("regularMarketPrice")
-            change = stock.info.get("regularMarketChangePercent")
-            sign = "+" if change is not None and change >= 0 else ""
-            if price is not None and change is not None:
-                us_lines.append(f"- {name}: {price:,} ({sign}{change:.2f}%)")
+            quote = quotes.get(ticker)
+            if quote is not None and quote.prev_close:
+                lines.append(f"- {name}: {quote.price:,.2f} ({quote.change_pct:+.2f}%)")
             else:
-                us_lines.append(f"- {name}: 정보없음")
-        results.append("🇺🇸 미국\n" + "\n".join(us_lines))
-    except Exception:
-        results.append("🇺🇸 미국\n- 미국 지수 정보를 불러올 수 없습니다.")
+                lines.append(f"- {name}: 정보없음")
+        results.append(f"{region}\n" + "\n".join(lines))
 
-    # --- 일본 니케이225 ---
-    try:
-        stock = yf.Ticker("^N225")
-        price = stock.info.get("regularMarketPrice")
-        change = stock.info.get("regularMarketChangePercent")
-        sign = "+" if change is not None and change >= 0 else ""
-        if price is not None and change is not None:
-            results.append(f"🇯🇵 일본\n- 니케이225: {price:,} ({sign}{change:.2f}%)")
-        else:
-            results.append(f"🇯🇵 일본\n- 니케이225 정보없음")
-    except Exception:
-        results.append("🇯🇵 일본\n- 니케이225 정보를 불러올 수 없습니다.")
+    return "📈 주요 금융시장 지수\n\n" + "\n\n".join(results)
 
-    # --- 중국 상해종합 ---
+DURATION_UNITS = {"m": 60, "분": 60, "h": 3600, "시간": 3600, "d": 86400, "일": 86400}
+DURATION_PATTERN = re.compile(r"^(\d+)\s*(m|h|d|분|시간|일)$")
+MAX_HISTORY_SECONDS = 90 * 86400
+
+def parse_duration(text, default=3600):
+    """'30m' / '2시간' / '7d' → 초 (없으면 default, 형식이 틀리거나 0이면 None)"""
+    if not text:
+        return default
+    match = DURATION_PATTERN.match(text.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        return None
+    return min(int(match.group(1)) * DURATION_UNITS[match.group(2)], MAX_HISTORY_SECONDS)
+
+def describe_duration(seconds):
+    if seconds % 86400 == 0:
+        return f"{seconds // 86400}일"
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}시간"
+    return f"{seconds // 60}분"
+
+def resolve_history_target(target):
+    """'!BTC' / '@삼성전자' / '#AAPL' → (표시 이름, [(기록 소스, 심볼, 소스 이름)], 가격 표기 함수) — 네트워크 없이"""
+    prefix, name = target[:1], target[1:].strip()
+    if not name:
+        return None, [], None
+    if prefix == "!":
+        symbol, _, kr_name = UPBIT_CATALOG.resolve(name)
+        guessed = guess_note(name, kr_name) if symbol else ""
+        symbol = symbol or name.upper()
+        label = f"{symbol} {kr_name or ''}".strip() + (f" ({guessed})" if guessed else "")
+        return label, [("upbit", symbol, "업비트"), ("bithumb", symbol, "빗썸")], format_krw
+    if prefix == "@":
+        code, stock_name = (name.zfill(6), name) if name.isdigit() else STOCK_INDEX.resolve(name)
+        if not code:
+            return name, [], None
+        guessed = stock_guess_note(name, stock_name)
+        return stock_name + (f" ({guessed})" if guessed else ""), [("krx", code, "네이버 금융")], format_krw
+    if prefix == "#":
+        return name.upper(), [("us", name.upper(), "Yahoo")], None
+    return None, [], None
+
+def get_price_history(arg):
+    """
+    /변동 !BTC 1h : 봇이 그동안 조회/수신해 로컬에 쌓아 둔 시세만으로 기간 변동률, 최고/최저, 스파크라인
+    """
+    parts = arg.split()
+    if not parts:
+        return "사용법: /변동 !BTC 1h / /변동 @삼성전자 30m / /변동 #AAPL 1d"
+    seconds = parse_duration(parts[1] if len(parts) > 1 else None)
+    if seconds is None:
+        return f"기간 형식을 알 수 없습니다: {parts[1]} (예: 30m, 1h, 7d)"
+    title, sources, krw = resolve_history_target(parts[0])
+    if title is None:
+        return "종목 앞에 !(코인) @(한국주식) #(미국주식) 중 하나를 붙여 주세요."
+
+    for source, symbol, source_name in sources:
+        window = QUOTE_HISTORY.window(source, symbol, seconds)
+        if window is None:
+            continue
+        fmt = (lambda p: f"₩{krw(p)}") if krw else (lambda p: f"${p:,.2f}")
+        change = (window["last"] / window["base"] - 1) * 100 if window["base"] else 0.0
+        since = datetime.fromtimestamp(window["since"], KST)
+        return (f"📈 [{title}] 최근 {describe_duration(seconds)} ({source_name} 기록)\n"
+                f"💰 {fmt(window['last'])} ({describe_duration(seconds)} 전 대비 {change:+.2f}%)\n"
+                f"🔺 최고 {fmt(window['high'])} / 🔻 최저 {fmt(window['low'])}\n"
+                f"{sparkline(window['points'])}\n"
+                f"⏱ {since:%m/%d %H:%M}부터 {len(window['points'])}개 구간 ({describe_duration(window['resolution'])} 단위)")
+    return f"[{title}] 기록된 시세가 없습니다. {parts[0]} 로 먼저 조회하면 그때부터 기록됩니다."
+
+def split_symbols(text):
+    """'BTC, ETH,SOL' → ['BTC', 'ETH', 'SOL'] (중복 제거, 최대 10개)"""
+    symbols = []
+    for part in text.split(","):
+        part = part.strip()
+        if part and part not in symbols:
+            symbols.append(part)
+    return symbols[:10]
+
+# --- 명령어 라우팅 ---
+
+# 정확히 일치하는 명령어: 명령어 → (메트릭 라벨, 처리)
+EXACT_COMMANDS = {
+    "/지수": ("indices", get_market_indices),
+    "/김프": ("kimchi_board", get_kimchi_board),
+    "/명령어": ("help", get_help),
+    "/한국주식 상승률": ("korea_ranking", lambda: get_korea_ranking(rise=True)),
+    "/한국주식 하락률": ("korea_ranking", lambda: get_korea_ranking(rise=False)),
+    "/미국주식 상승률": ("us_ranking", lambda: get_us_ranking(rise=True)),
+    "/미국주식 하락률": ("us_ranking", lambda: get_us_ranking(rise=False)),
+}
+
+# 인자를 받는 명령어: 첫 단어 → (메트릭 라벨, 처리(나머지 문자열))
+ARG_COMMANDS = {
+    "/변동": ("history", get_price_history),
+}
+
+# 접두어 명령어: 접두어 → (메트릭 라벨, 단일 종목 처리, 쉼표로 여러 종목일 때 처리)
+PREFIX_COMMANDS = {
+    "!": ("coin", get_coin_price, get_coin_prices),
+    "@": ("kr_stock", get_korean_stock_price, None),
+    "#": ("us_stock", get_us_stock_price, get_us_stock_prices),
+}
+
+UNSUPPORTED_TEXT = "지원하지 않는 명령어입니다."
+
+# 같은 발화가 동시에 여러 번 들어오면 한 번만 처리해 결과를 나눠준다
+UTTERANCE_FLIGHT = SingleFlight("utterance")
+
+def dispatch(utter):
+    """발화 → 응답 텍스트"""
+    # 라우팅과 single-flight 키가 같은 문자열을 보도록 공백을 한 번만 정리한다
+    utter = " ".join(utter.split())
+    command, handler = route(utter)
+    with track_request(command, utter):
+        return UTTERANCE_FLIGHT.do(utter, handler)
+
+def route(utter):
+    """발화 → (메트릭 라벨, 응답 텍스트를 만드는 함수)"""
+    exact = EXACT_COMMANDS.get(utter)
+    if exact:
+        return exact
+    name, _, arg = utter.partition(" ")
+    if name in ARG_COMMANDS:
+        command, handler = ARG_COMMANDS[name]
+        return command, lambda: handler(arg.strip())
+    prefix = PREFIX_COMMANDS.get(utter[:1])
+    if prefix:
+        command, single, multi = prefix
+        arg = utter[1:]
+        if multi and "," in arg:
+            return f"{command}_multi", lambda: multi(split_symbols(arg))
+        return command, lambda: single(arg)
+    return "unsupported", lambda: UNSUPPORTED_TEXT
+
+def kakao_text(text):
+    """카카오 i 오픈빌더 simpleText 응답"""
+    return {"version": "2.0", "template": {"outputs": [{"simpleText": {"text": text}}]}}
+
+def get_utterance(req):
+    return (req or {}).get("userRequest", {}).get("utterance", "").strip()
+
+# 카카오 5초 제한을 넘기기 쉬운 명령어는 callbackUrl이 있으면 콜백으로 응답
+SLOW_EXACT_COMMANDS = {"/지수", "/김프"}
+SLOW_PREFIXES = ("!",)
+
+def is_slow_command(utter):
+    return utter in SLOW_EXACT_COMMANDS or utter.startswith(SLOW_PREFIXES)
+
+CALLBACKS = CallbackDispatcher(dispatch, kakao_text)
+
+def handle_webhook(req):
+    """카카오 스킬 요청 → 응답 JSON (느린 명령어는 useCallback 즉시 응답)"""
+    start = time.perf_counter()
     try:
-        stock = yf.Ticker("000001.SS")
-        price = stock.info.get("regularMarketPrice")
-        change = stock.info.get("regularMarketChangePercent")
-        sign = "+" if change is not None and change >= 0 else ""
-        if price is not None and change is not None:
-            results.append(f"🇨🇳 중국\n- 상해종합: {price:,} ({sign}{change:.2f}%)")
-        else:
-            results.append(f"🇨🇳 중국\n- 상해종합 정보없음")
-    except Exception:
-        results.append("🇨🇳 중국\n- 상해종합 정보를 불러올 수 없습니다.")
-
-    return "📈 주요 금융시장 지수\n\n" + "\n\n".join(results)
+        utter = get_utterance(req)
+        callback_url = (req or {}).get("userRequest", {}).get("callbackUrl")
+        if callback_url and is_slow_command(utter):
+            CALLBACKS.submit(utter, callback_url)
+            return kakao_callback_ack()
+        return kakao_text(dispatch(utter))
+    finally:
+        STARTUP.served(time.perf_counter() - start)
 
 # --- Flask 라우터 ---
 
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    return jsonify({**QUOTE_CACHE.stats(), "utterance_singleflight": UTTERANCE_FLIGHT.stats()})
+
+@app.route("/http-stats", methods=["GET"])
+def http_pool_stats():
+    return jsonify(http_stats())
+
+def collect_runtime_stats():
+    """캐시/HTTP 풀/single-flight/콜백 통계를 /metrics 형식으로"""
+    cache = QUOTE_CACHE.stats()
+    hosts = http_stats()
+    flights = {"utterance": UTTERANCE_FLIGHT.stats(), "upstream": cache["singleflight"]}
+    callbacks = CALLBACKS.stats()
+    return [
+        ("chatbot_cache_entries", "gauge", "Quote cache entries", [({}, cache["size"])]),
+        ("chatbot_cache_hit_ratio", "gauge", "Quote cache hit ratio (hits + stale) by source",
+         [({"source": s}, c["hit_ratio"]) for s, c in sorted(cache["sources"].items())]),
+        ("chatbot_cache_evictions_total", "counter", "Quote cache evictions by source",
+         [({"source": s}, c["evictions"]) for s, c in sorted(cache["sources"].items())]),
+        ("chatbot_http_requests_total", "counter", "Upstream HTTP responses by host and status",
+         [({"host": h, "status": code}, n) for h, p in hosts.items() for code, n in sorted(p["statuses"].items())]),
+        ("chatbot_http_errors_total", "counter", "Upstream HTTP errors by host",
+         [({"host": h}, p["errors"]) for h, p in hosts.items()]),
+        ("chatbot_http_timeouts_total", "counter", "Upstream HTTP timeouts by host",
+         [({"host": h}, p["timeouts"]) for h, p in hosts.items()]),
+        ("chatbot_breaker_open", "gauge", "1 if the host circuit breaker is open or half-open",
+         [({"host": h}, int(p["breaker"]["state"] != "closed")) for h, p in hosts.items()]),
+        ("chatbot_http_short_circuits_total", "counter", "Requests skipped by an open circuit breaker",
+         [({"host": h}, p["short_circuits"]) for h, p in hosts.items()]),
+        ("chatbot_singleflight_total", "counter", "Single-flight calls by group and result",
+         [({"group": g, "result": r}, f[r]) for g, f in flights.items() for r in ("executed", "coalesced")]),
+        ("chatbot_callbacks_total", "counter", "Kakao callback jobs by result",
+         [({"result": r}, callbacks[r]) for r in ("submitted", "deduped", "timeouts", "post_errors")]),
+        ("chatbot_history_records_total", "counter", "Quotes written to the local history store",
+         [({}, QUOTE_HISTORY.records)]),
+    ]
+
+REGISTRY.add_collector(collect_runtime_stats)
+REGISTRY.add_collector(STARTUP.collect)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
 @app.route("/webhook", methods=["POST"])
 def webhook():
-    req = request.get_json()
-    utter = req.get("userRequest", {}).get("utterance", "").strip()
-    if utter == "/지수":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_market_indices()}}]}})
-    if utter == "/명령어":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_help()}}]}})
-    if utter == "/한국주식 상승률":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_korea_ranking(rise=True)}}]}})
-    if utter == "/한국주식 하락률":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_korea_ranking(rise=False)}}]}})
-    if utter == "/미국주식 상승률":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_us_ranking(rise=True)}}]}})
-    if utter == "/미국주식 하락률":
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_us_ranking(rise=False)}}]}})
-    if utter.startswith("!"):
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_coin_price(utter[1:])}}]}})
-    if utter.startswith("@"):
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_korean_stock_price(utter[1:])}}]}})
-    if utter.startswith("#"):
-        return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": get_us_stock_price(utter[1:])}}]}})
-    return jsonify({"version": "2.0", "template": {"outputs": [{"simpleText": {"text": "지원하지 않는 명령어입니다."}}]}})
+    return jsonify(handle_webhook(request.get_json()))
+
+# --- 시작 워밍업: 웹훅은 바로 받고, 첫 요청이 느려지지 않도록 뒤에서 미리 채워 둔다 ---
+
+STARTUP.add("exchange_rate", get_exchange_rate)
+STARTUP.add("upbit_catalog", UPBIT_CATALOG.wait_loaded, None)
+STARTUP.add("coins", get_upbit_tickers, WARMUP_SYMBOLS)
+STARTUP.add("stock_index", STOCK_INDEX.wait_loaded, None)
+# pandas/lxml을 불러오는 작업은 인스턴스를 깨운 첫 요청을 처리한 뒤로 미룬다
+# (순위 스냅샷이 미리 시작돼 있지 않아도 /한국주식·/미국주식은 그 자리에서 만든다)
+STARTUP.defer("rankings", RANKINGS.start)
+if WARMUP_IMPORTS:
+    STARTUP.defer("heavy_imports", preload_modules)
+STARTUP.ready()
+STARTUP.start()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
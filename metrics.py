@@ -0,0 +1,180 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+
+# 지연 시간 히스토그램 구간(초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 이 시간(ms)을 넘긴 요청은 로그로 남긴다 (0이면 끔)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0"))
+
+# 현재 처리 중인 명령어 종류 (fan_out 스레드로도 전파된다)
+# 백그라운드 갱신 작업 등 명령어 밖에서 일어난 조회는 "background"
+CURRENT_COMMAND = contextvars.ContextVar("command", default="background")
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names, values, extra=""):
+    parts = [f'{n}="{escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, count in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, values)} {count}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        self._series = {}  # 라벨값 → [구간별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((values, list(series)) for values, series in self._series.items())
+        for values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = format_labels(self.labels, values, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = format_labels(self.labels, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, values)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=()):
+        metric = Histogram(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """collector() → [(이름, 타입, 도움말, [(라벨dict, 값)])] : 다른 모듈의 통계를 그대로 노출"""
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in samples:
+                        lines.append(f"{name}{format_labels(labels.keys(), labels.values())} {value}")
+            except Exception as e:
+                print(f"Metrics Collector Error: {e}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.histogram("chatbot_fetch_seconds", "Upstream fetch latency by source and command", ("source", "command"))
+FETCH_TOTAL = REGISTRY.counter("chatbot_fetch_total", "Upstream fetch results by source, command and outcome", ("source", "command", "outcome"))
+REQUEST_SECONDS = REGISTRY.histogram("chatbot_request_seconds", "Chat command latency by command", ("command",))
+REQUEST_TOTAL = REGISTRY.counter("chatbot_requests_total", "Chat commands handled by command", ("command",))
+DEADLINE_TOTAL = REGISTRY.counter("chatbot_fanout_deadline_total", "Fan-out calls that missed the deadline", ("call", "command"))
+HEDGE_TOTAL = REGISTRY.counter("chatbot_hedge_total", "Hedged calls by which request answered (or fired)", ("call", "result"))
+
+def error_at(index):
+    """(값..., 에러 메시지, ...) 튜플을 돌려주는 조회 함수용 error_of"""
+    return lambda result: result[index]
+
+def outcome_of(error):
+    if error is None:
+        return "ok"
+    text = str(error).lower()
+    return "timeout" if "timed out" in text or "timeout" in text else "error"
+
+def instrument(source, error_of=None):
+    """
+    업스트림 조회 함수의 지연/결과를 source 라벨로 기록하는 데코레이터.
+    error_of(반환값)이 에러 메시지를 돌려주면 실패로 센다 (기본: None 반환이면 실패)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            command = CURRENT_COMMAND.get()
+            start = time.perf_counter()
+            error = None
+            try:
+                result = func(*args, **kwargs)
+                error = error_of(result) if error_of else (None if result is not None else "empty")
+                return result
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                FETCH_SECONDS.observe(time.perf_counter() - start, source, command)
+                FETCH_TOTAL.inc(source, command, outcome_of(error))
+        return wrapper
+    return decorator
+
+class track_request:
+    """명령어 하나의 처리 시간을 기록하고, 처리 중에는 CURRENT_COMMAND를 설정한다"""
+
+    def __init__(self, command, utter=""):
+        self.command = command
+        self.utter = utter
+
+    def __enter__(self):
+        self.token = CURRENT_COMMAND.set(self.command)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        CURRENT_COMMAND.reset(self.token)
+        REQUEST_SECONDS.observe(elapsed, self.command)
+        REQUEST_TOTAL.inc(self.command)
+        if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+            print(f"Slow Request: [{self.command}] {self.utter!r} {elapsed * 1000:.0f}ms")
+        return False
+
+def render_metrics():
+    return REGISTRY.render()
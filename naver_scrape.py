@@ -0,0 +1,105 @@
+# 네이버 금융 페이지 인코딩
+NAVER_ENCODING = "cp949"
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+XPATHS = {
+    # 종목 페이지 (rate_info 영역)
+    "price": f".//p[{has_class('no_today')}]//span[{has_class('blind')}]",
+    "change": f".//p[{has_class('no_exday')}]//span[{has_class('blind')}]",
+    # BeautifulSoup "p.no_exday span:nth-of-type(2)" 와 같은 노드
+    "change_sign": f".//p[{has_class('no_exday')}]//span[count(preceding-sibling::span) = 1]",
+    "volume": f".//td[{has_class('first')}]//span[{has_class('blind')}]",
+    # 상승/하락 순위 (type_2 표)
+    "rank_row": f".//table[{has_class('type_2')}]//tr",
+    # 검색 결과 첫 종목 링크
+    "search_link": ".//a[contains(@href, '/item/main.nhn?code=')]",
+}
+
+# lxml은 첫 파싱 때 불러오고, XPath/파서는 한 번만 컴파일해 재사용
+_compiled = {}
+_parsers = {}
+
+def xpath(name):
+    compiled = _compiled.get(name)
+    if compiled is None:
+        from lxml import etree
+        compiled = _compiled[name] = etree.XPath(XPATHS[name])
+    return compiled
+
+def html_parser(encoding):
+    parser = _parsers.get(encoding)
+    if parser is None:
+        from lxml import etree
+        parser = _parsers[encoding] = etree.HTMLParser(encoding=encoding, remove_comments=True)
+    return parser
+
+def region(content, start_marker, end_marker):
+    """
+    원본 바이트에서 start_marker가 들어있는 태그부터 end_marker까지만 잘라낸다.
+    표식을 못 찾으면 전체를 그대로 돌려준다
+    """
+    start = content.find(start_marker)
+    if start < 0:
+        return content
+    start = content.rfind(b"<", 0, start)
+    end = content.find(end_marker, start)
+    if end < 0:
+        return content[start:]
+    return content[start:end + len(end_marker)]
+
+def parse(content, encoding=NAVER_ENCODING):
+    from lxml import etree
+    return etree.fromstring(content, html_parser(encoding))
+
+def text_of(node):
+    return "".join(node.itertext()).strip()
+
+def parse_stock_quote(content, encoding=NAVER_ENCODING):
+    """
+    종목 페이지 바이트 → (현재가, 등락, 부호, 거래량). 태그를 찾지 못하면 None
+    """
+    root = parse(region(content, b'class="rate_info"', b"</table>"), encoding)
+    if root is None:
+        return None
+    price_tag = xpath("price")(root)
+    change_tag = xpath("change")(root)
+    change_sign_tag = xpath("change_sign")(root)
+    volume_tag = xpath("volume")(root)
+    if not price_tag or not change_tag or not volume_tag:
+        return None
+
+    price = int(text_of(price_tag[0]).replace(",", ""))
+    change = float(text_of(change_tag[0]).replace(",", ""))
+    sign_classes = change_sign_tag[0].get("class", "").split() if change_sign_tag else []
+    sign = "+" if "up" in sign_classes else "-"
+    volume = int(text_of(volume_tag[1]).replace(",", "")) if len(volume_tag) > 1 else 0
+    return price, change, sign, volume
+
+def parse_ranking(content, limit=20, encoding=NAVER_ENCODING):
+    """상승/하락 순위 페이지 바이트 → [(종목명, 종목코드, 등락률)]"""
+    root = parse(region(content, b'class="type_2"', b"</table>"), encoding)
+    if root is None:
+        return []
+    results = []
+    for row in xpath("rank_row")(root)[2:]:  # 헤더 제외
+        cols = row.findall("td")
+        if len(cols) < 6:
+            continue
+        link = cols[1].find(".//a")
+        code = link.get("href", "").split("code=")[-1] if link is not None else "Unknown"
+        results.append((text_of(cols[1]), code, text_of(cols[5])))
+        if len(results) >= limit:
+            break
+    return results
+
+def parse_search_link(content, encoding=NAVER_ENCODING):
+    """검색 결과 페이지 바이트 → (종목코드, 종목명), 없으면 (None, None)"""
+    root = parse(region(content, b'class="tbl_search"', b"</table>"), encoding)
+    if root is None:
+        return None, None
+    links = xpath("search_link")(root)
+    if not links:
+        return None, None
+    return links[0].get("href").split("code=")[-1], text_of(links[0])
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fetch_pool import EXECUTOR
+from metrics import CURRENT_COMMAND, REGISTRY
+from singleflight import SingleFlight
+
+# 소스별 기본 TTL(초). QUOTE_CACHE_TTL="cmc=120,upbit=2" 형태로 덮어쓸 수 있다.
+DEFAULT_TTLS = {
+    "cmc": 60.0,
+    "upbit": 3.0,
+    "bithumb": 3.0,
+    "fx": 300.0,
+    "naver_stock": 10.0,
+    "naver_search": 86400.0,
+    "yahoo": 15.0,
+    "cmc_listings": 300.0,
+    "kimchi": 30.0,
+}
+# TTL이 지난 값을 이 배수만큼의 시간까지는 갱신 중에 그대로 내보낸다
+STALE_FACTOR = float(os.environ.get("QUOTE_CACHE_STALE_FACTOR", "10"))
+# 다른 거래소의 최신 시세와 맞대어 계산하는 소스는 TTL 한 번만큼만 넘겨서 내보낸다
+STALE_FACTORS = {
+    "cmc_listings": 2.0,
+    "kimchi": 2.0,
+}
+MAX_ENTRIES = int(os.environ.get("QUOTE_CACHE_MAX_ENTRIES", "2048"))
+
+CACHE_LOOKUPS = REGISTRY.counter("chatbot_cache_lookups_total", "Quote cache lookups by source, command and result", ("source", "command", "result"))
+
+def parse_ttls(spec):
+    ttls = dict(DEFAULT_TTLS)
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        source, ttl = item.split("=", 1)
+        try:
+            ttls[source.strip()] = float(ttl)
+        except ValueError:
+            print(f"Quote Cache TTL Error: {item}")
+    return ttls
+
+class QuoteCache:
+    """
+    (소스, 심볼, 마켓) 단위 시세 캐시.
+    TTL이 지나면 기존 값을 바로 돌려주고 백그라운드에서 한 번만 갱신한다 (stale-while-revalidate).
+    """
+
+    def __init__(self, ttls=None, max_entries=MAX_ENTRIES, stale_factor=STALE_FACTOR, stale_factors=None):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.stale_factor = stale_factor
+        self.stale_factors = dict(STALE_FACTORS if stale_factors is None else stale_factors)
+        self._entries = OrderedDict()  # key -> [값, 저장시각, 갱신중 여부]
+        self._lock = threading.Lock()
+        self._stats = {}
+        # 캐시에 없는 같은 (소스, 심볼, 마켓)을 동시에 조회하면 업스트림 호출은 한 번만
+        self.flight = SingleFlight("upstream")
+
+    def _count(self, source, field):
+        counters = self._stats.setdefault(source, {"hits": 0, "stale": 0, "misses": 0, "evictions": 0})
+        counters[field] += 1
+        if field != "evictions":
+            CACHE_LOOKUPS.inc(source, CURRENT_COMMAND.get(), field)
+
+    def _lookup(self, key):
+        """
+        락을 잡은 상태에서 호출. ("hit"|"stale"|"refresh"|"miss", 값) 반환
+        "refresh"는 오래된 값을 내보내면서 이 호출자가 갱신을 맡아야 하는 경우
+        """
+        source = key[0]
+        entry = self._entries.get(key)
+        if entry is not None:
+            ttl = self.ttls.get(source, 10.0)
+            age = time.monotonic() - entry[1]
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self._count(source, "hits")
+                return "hit", entry[0]
+            if age < ttl * self.stale_factors.get(source, self.stale_factor):
+                self._entries.move_to_end(key)
+                self._count(source, "stale")
+                if entry[2]:
+                    return "stale", entry[0]
+                entry[2] = True
+                return "refresh", entry[0]
+        self._count(source, "misses")
+        return "miss", None
+
+    def get(self, source, symbol, market, loader, valid=None):
+        """
+        캐시에 값이 있으면 돌려주고, 없으면 loader()를 호출해 채운다.
+        valid(값)이 False인 결과(에러 응답 등)는 저장하지 않는다.
+        """
+        key = (source, symbol, market)
+        with self._lock:
+            state, value = self._lookup(key)
+        if state == "refresh":
+            EXECUTOR.submit(self._refresh, [key], lambda keys: {keys[0]: loader()}, valid)
+        if state != "miss":
+            return value
+
+        return self.flight.do(key, lambda: self._load(key, loader, valid))
+
+    def _load(self, key, loader, valid):
+        value = loader()
+        self._store(key, value, valid)
+        return value
+
+    def get_many(self, source, symbols, market, loader_many, valid=None):
+        """
+        여러 심볼을 한 번에 조회. 캐시에 없는 심볼만 모아 loader_many(심볼 목록)를 한 번 호출한다.
+        loader_many는 {심볼: 값}을 반환해야 하며, 결과에 없는 심볼은 빠진 채로 돌려준다.
+        """
+        results = {}
+        missing = []
+        refresh = []
+        with self._lock:
+            for symbol in symbols:
+                state, value = self._lookup((source, symbol, market))
+                if state == "miss":
+                    missing.append(symbol)
+                    continue
+                results[symbol] = value
+                if state == "refresh":
+                    refresh.append((source, symbol, market))
+
+        def load_keys(keys):
+            loaded = loader_many([k[1] for k in keys])
+            return {(source, symbol, market): value for symbol, value in loaded.items()}
+
+        if refresh:
+            EXECUTOR.submit(self._refresh, refresh, load_keys, valid)
+        if missing:
+            flight_key = (source, tuple(sorted(missing)), market)
+            results.update(self.flight.do(flight_key, lambda: self._load_many(source, missing, market, loader_many, valid)))
+        return results
+
+    def _load_many(self, source, symbols, market, loader_many, valid):
+        loaded = loader_many(symbols)
+        for symbol, value in loaded.items():
+            self._store((source, symbol, market), value, valid)
+        return loaded
+
+    def _refresh(self, keys, load_keys, valid):
+        try:
+            for key, value in load_keys(keys).items():
+                self._store(key, value, valid)
+        except Exception as e:
+            print(f"Quote Cache Refresh Error {keys}: {e}")
+        finally:
+            with self._lock:
+                for key in keys:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry[2] = False
+
+    def _store(self, key, value, valid):
+        if valid is not None and not valid(value):
+            return
+        with self._lock:
+            self._entries[key] = [value, time.monotonic(), False]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._count(old_key[0], "evictions")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            sources = {source: dict(c) for source, c in self._stats.items()}
+            size = len(self._entries)
+        for c in sources.values():
+            served = c["hits"] + c["stale"]
+            total = served + c["misses"]
+            c["hit_ratio"] = round(served / total, 4) if total else 0.0
+        return {"size": size, "max_entries": self.max_entries, "sources": sources,
+                "singleflight": self.flight.stats()}
+
+QUOTE_CACHE = QuoteCache(ttls=parse_ttls(os.environ.get("QUOTE_CACHE_TTL")))
@@ -0,0 +1,160 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+HISTORY_DIR = os.environ.get("QUOTE_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history"))
+HISTORY_ENABLED = os.environ.get("QUOTE_HISTORY", "1") != "0"
+
+# 단계별 (구간 길이(초), 칸 수): 1분×1일, 15분×7일, 1시간×90일.
+# 칸이 다 차면 가장 오래된 구간부터 덮어쓰므로 파일 크기와 보관 기간이 고정된다.
+TIERS = ((60, 1440), (900, 672), (3600, 2160))
+
+MAGIC = b"QHS1"
+HEADER = struct.Struct("<4sI")  # 매직, 단계 수
+TIER_HEADER = struct.Struct("<II")  # 구간 길이, 칸 수
+RECORD = struct.Struct("<Iddd")  # 구간 시작(unix 초), 마지막 가격, 최저, 최고
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+def series_path(root, source, symbol):
+    safe = re.sub(r"[^0-9A-Za-z._=^-]", "_", symbol.upper())
+    return os.path.join(root, source, f"{safe}.qh")
+
+class Series:
+    """
+    심볼 하나의 시세 기록 파일 (mmap). 단계마다 고정 길이 레코드 링 버퍼가 이어져 있고,
+    칸 위치는 (구간 시작 // 구간 길이) % 칸 수 로 정해지므로 색인 없이 바로 쓰고 읽는다.
+    """
+
+    def __init__(self, path, tiers=TIERS):
+        self.tiers = tiers
+        header_size = HEADER.size + TIER_HEADER.size * len(tiers)
+        self.offsets = []
+        offset = header_size
+        for _, slots in tiers:
+            self.offsets.append(offset)
+            offset += slots * RECORD.size
+        size = offset
+
+        header = HEADER.pack(MAGIC, len(tiers)) + b"".join(TIER_HEADER.pack(*t) for t in tiers)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            if f.read(header_size) != header or os.fstat(f.fileno()).st_size != size:
+                # 처음 만들었거나 단계 구성이 바뀐 파일은 새로 시작
+                f.seek(0)
+                f.truncate(0)
+                f.write(header)
+                f.truncate(size)
+                f.flush()
+            self.mm = mmap.mmap(f.fileno(), size)
+        self.lock = threading.Lock()
+
+    def append(self, ts, price):
+        ts = int(ts)
+        with self.lock:
+            for (length, slots), base in zip(self.tiers, self.offsets):
+                start = ts - ts % length
+                pos = base + (start // length % slots) * RECORD.size
+                old_start, _, low, high = RECORD.unpack_from(self.mm, pos)
+                if old_start == start:
+                    RECORD.pack_into(self.mm, pos, start, price, min(low, price), max(high, price))
+                else:
+                    RECORD.pack_into(self.mm, pos, start, price, price, price)
+
+    def read(self, tier, since):
+        """since(unix 초) 이후 구간들의 (구간 시작, 마지막, 최저, 최고) 를 시간순으로"""
+        length, slots = self.tiers[tier]
+        base = self.offsets[tier]
+        with self.lock:
+            raw = self.mm[base:base + slots * RECORD.size]
+        rows = [r for r in RECORD.iter_unpack(raw) if r[0] and r[0] + length > since]
+        rows.sort()
+        return rows
+
+class QuoteHistory:
+    """
+    봇이 조회하거나 스트림으로 받은 시세를 (소스, 심볼)별 파일에 쌓는 로컬 시계열 저장소.
+    기록은 같은 구간 안에서 마지막/최저/최고만 갱신하고, 조회는 네트워크 없이 파일에서 바로 읽는다.
+    """
+
+    def __init__(self, root=HISTORY_DIR, enabled=HISTORY_ENABLED, tiers=TIERS):
+        self.root = root
+        self.enabled = enabled
+        self.tiers = tiers
+        self._series = {}
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def series(self, source, symbol, create=True):
+        key = (source, symbol.upper())
+        series = self._series.get(key)
+        if series is None:
+            path = series_path(self.root, source, symbol)
+            if not create and not os.path.exists(path):
+                return None
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = Series(path, self.tiers)
+        return series
+
+    def record(self, source, symbol, price, ts=None):
+        if not self.enabled or not price or price != price:
+            return
+        try:
+            self.series(source, symbol).append(ts or time.time(), float(price))
+            self.records += 1
+        except Exception as e:
+            print(f"Quote History Error {source}/{symbol}: {e}")
+
+    def record_many(self, source, prices, ts=None):
+        """{심볼: 가격}"""
+        ts = ts or time.time()
+        for symbol, price in prices.items():
+            self.record(source, symbol, price, ts)
+
+    def window(self, source, symbol, seconds, now=None):
+        """
+        최근 seconds초 구간 요약. 기간을 덮는 가장 촘촘한 단계에서 읽는다.
+        기록이 없으면 None, 있으면 {"base", "last", "low", "high", "points", "since", "resolution"}
+        """
+        if not self.enabled:
+            return None
+        series = self.series(source, symbol, create=False)
+        if series is None:
+            return None
+        now = now or time.time()
+        tier = next((i for i, (length, slots) in enumerate(self.tiers) if length * slots >= seconds), len(self.tiers) - 1)
+        rows = series.read(tier, now - seconds)
+        if not rows:
+            return None
+        return {
+            "base": rows[0][1],
+            "last": rows[-1][1],
+            "low": min(r[2] for r in rows),
+            "high": max(r[3] for r in rows),
+            "points": [r[1] for r in rows],
+            "since": rows[0][0],
+            "resolution": self.tiers[tier][0],
+        }
+
+    def stats(self):
+        return {"enabled": self.enabled, "series": len(self._series), "records": self.records}
+
+def sparkline(points, width=24):
+    """가격 목록 → ▁▂▃▄▅▆▇█ 문자열 (width개 구간으로 줄여 각 구간의 마지막 값)"""
+    if not points:
+        return ""
+    if len(points) > width:
+        step = len(points) / width
+        points = [points[min(len(points) - 1, int((i + 1) * step) - 1)] for i in range(width)]
+    low, high = min(points), max(points)
+    if high == low:
+        return SPARK_CHARS[3] * len(points)
+    scale = (len(SPARK_CHARS) - 1) / (high - low)
+    return "".join(SPARK_CHARS[int((p - low) * scale)] for p in points)
+
+QUOTE_HISTORY = QuoteHistory()
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+KST = ZoneInfo("Asia/Seoul")
+NEW_YORK = ZoneInfo("America/New_York")
+
+# 장중/장외 갱신 주기(초)
+OPEN_INTERVAL = float(os.environ.get("RANKING_OPEN_INTERVAL", "60"))
+CLOSED_INTERVAL = float(os.environ.get("RANKING_CLOSED_INTERVAL", "3600"))
+
+# 시장별 (시간대, 개장, 마감) - 공휴일은 고려하지 않음
+MARKET_HOURS = {
+    "KRX": (KST, dtime(9, 0), dtime(15, 30)),
+    "US": (NEW_YORK, dtime(9, 30), dtime(16, 0)),
+}
+
+def is_market_open(market, now=None):
+    tz, open_at, close_at = MARKET_HOURS[market]
+    local = (now or datetime.now(tz)).astimezone(tz)
+    return local.weekday() < 5 and open_at <= local.time() <= close_at
+
+class RankingJob:
+    def __init__(self, builder, market):
+        self.builder = builder
+        self.market = market
+        self.text = None
+        self.reply = None  # 기준 시각까지 붙인 응답 문자열
+        self.updated_at = None  # KST datetime
+        self.refreshed = 0.0  # monotonic
+        self.open_at_refresh = False
+        self.lock = threading.Lock()
+
+    def due(self, now):
+        is_open = is_market_open(self.market)
+        if self.text is None:
+            return True
+        # 장 마감 직후에는 종가 기준으로 한 번 더 갱신
+        if self.open_at_refresh and not is_open:
+            return True
+        interval = OPEN_INTERVAL if is_open else CLOSED_INTERVAL
+        return now - self.refreshed >= interval
+
+    def refresh(self):
+        with self.lock:
+            is_open = is_market_open(self.market)
+            text = self.builder()
+            self.text = text
+            self.updated_at = datetime.now(KST)
+            self.reply = f"{text}\n\n⏱ {self.updated_at:%m/%d %H:%M} 기준"
+            self.refreshed = time.monotonic()
+            self.open_at_refresh = is_open
+
+class RankingSnapshots:
+    """
+    상승률/하락률 순위를 주기적으로 미리 만들어 두고 응답 문자열을 메모리에서 바로 내준다.
+    장중에는 OPEN_INTERVAL, 장외에는 CLOSED_INTERVAL 간격으로 갱신.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._started = False
+
+    def register(self, key, builder, market):
+        self.jobs[key] = RankingJob(builder, market)
+
+    def start(self, tick=15):
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._loop, args=(tick,), name="ranking-snapshot", daemon=True).start()
+
+    def _loop(self, tick):
+        while True:
+            now = time.monotonic()
+            for key, job in self.jobs.items():
+                if job.due(now):
+                    try:
+                        job.refresh()
+                    except Exception as e:
+                        # 실패하면 다음 주기까지 기존 스냅샷 유지
+                        job.refreshed = now
+                        print(f"Ranking Snapshot Error {key}: {e}")
+            time.sleep(tick)
+
+    def get(self, key):
+        """
+        미리 만든 순위 문자열 + 기준 시각. 아직 스냅샷이 없으면 그 자리에서 한 번 만든다.
+        builder에서 난 예외는 그대로 올라간다.
+        """
+        job = self.jobs[key]
+        if job.text is None:
+            job.refresh()
+        return job.reply
+
+RANKINGS = RankingSnapshots()
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+
+# 1이면 준비 단계/워밍업 소요 시간을 표준 출력으로 보고
+STARTUP_PROFILE = os.environ.get("STARTUP_PROFILE") == "1"
+# 0이면 시세 워밍업 작업을 띄우지 않는다 (카탈로그/인덱스는 첫 조회 때 채워진다)
+WARMUP_ENABLED = os.environ.get("WARMUP", "1") != "0"
+# 첫 요청 전에 미리 받아둘 코인 심볼
+WARMUP_SYMBOLS = [s.strip().upper() for s in os.environ.get("WARMUP_SYMBOLS", "BTC,ETH,XRP,SOL").split(",") if s.strip()]
+# 첫 /지수, /김프 요청이 기다리지 않도록 무거운 모듈을 미리 불러온다 (첫 요청을 처리한 뒤에)
+WARMUP_IMPORTS = os.environ.get("WARMUP_IMPORTS", "1") != "0"
+# 요청이 이 시간(초) 동안 없으면 첫 요청을 기다리지 않고 미뤄 둔 작업을 시작한다
+WARMUP_IDLE = float(os.environ.get("WARMUP_IDLE", "30"))
+HEAVY_MODULES = ("pandas", "yfinance", "lxml.etree")
+
+def preload_modules(names=HEAVY_MODULES):
+    import importlib
+
+    for name in names:
+        importlib.import_module(name)
+
+class StartupProfile:
+    """
+    프로세스 준비 과정 기록. mark()로 import/초기화 단계를 순서대로 남기고,
+    워밍업 작업은 백그라운드 스레드 하나에서 차례로 돌려 각각의 소요 시간을 기록한다.
+    defer()로 넣은 CPU를 많이 쓰는 작업은 첫 요청을 처리한 뒤(또는 WARMUP_IDLE초 동안 요청이 없으면) 시작해,
+    인스턴스를 깨운 첫 요청과 GIL을 다투지 않게 한다.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (단계, 소요 초)
+        self.warmups = []  # (작업, 소요 초, 에러, 미룬 작업 여부)
+        self.ready_after = None
+        self.first_request = None  # (처리 초, 시작부터 끝날 때까지 초)
+        self.settled_by = None  # "request" | "idle" | "manual"
+        self.settled = threading.Event()
+        self.done = threading.Event()
+        self._last = self.started
+        self._tasks = []
+        self._deferred = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """직전 mark 이후 걸린 시간을 phase로 기록"""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append((phase, now - self._last))
+            self._last = now
+
+    def ready(self):
+        """요청을 받을 준비가 된 시점 (워밍업은 아직 진행 중일 수 있다)"""
+        self.mark("app")
+        self.ready_after = time.perf_counter() - self.started
+        if STARTUP_PROFILE:
+            print(f"Startup: ready in {self.ready_after * 1000:.0f}ms")
+
+    def add(self, name, func, *args):
+        """바로 시작하는 워밍업 작업 (네트워크 위주)"""
+        self._tasks.append((name, func, args))
+
+    def defer(self, name, func, *args):
+        """첫 요청 뒤로 미루는 작업 (WARMUP=0이어도 실행된다)"""
+        self._deferred.append((name, func, args))
+
+    def served(self, seconds):
+        """웹훅 요청 하나를 처리했다. 첫 요청이면 지연을 기록하고 미뤄 둔 작업을 풀어 준다"""
+        if self.first_request is not None:
+            return
+        with self._lock:
+            if self.first_request is not None:
+                return
+            self.first_request = (seconds, time.perf_counter() - self.started)
+        if STARTUP_PROFILE:
+            print(f"Startup: first request {seconds * 1000:.0f}ms ({self.first_request[1] * 1000:.0f}ms after start)")
+        self.settle("request")
+
+    def settle(self, reason="manual"):
+        if not self.settled.is_set():
+            self.settled_by = reason
+            self.settled.set()
+
+    def start(self, enabled=WARMUP_ENABLED):
+        if self._started:
+            return
+        self._started = True
+        if not enabled:
+            self._tasks = []
+        threading.Thread(target=self._run, name="startup-warmup", daemon=True).start()
+
+    def _run(self):
+        for name, func, args in self._tasks:
+            self._call(name, func, args, False)
+        if not self.settled.wait(WARMUP_IDLE):
+            self.settle("idle")
+        for name, func, args in self._deferred:
+            self._call(name, func, args, True)
+        self.done.set()
+        if STARTUP_PROFILE:
+            print(self.report())
+
+    def _call(self, name, func, args, deferred):
+        start = time.perf_counter()
+        error = None
+        try:
+            func(*args)
+        except Exception as e:
+            error = str(e)
+            print(f"Warmup Error: {name}: {e}")
+        with self._lock:
+            self.warmups.append((name, time.perf_counter() - start, error, deferred))
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+            warmups = list(self.warmups)
+        lines = ["[시작 프로파일]"]
+        for phase, seconds in phases:
+            lines.append(f"  {phase:<16}{seconds * 1000:8.1f}ms")
+        if self.ready_after is not None:
+            lines.append(f"  {'= ready':<16}{self.ready_after * 1000:8.1f}ms")
+        if self.first_request is not None:
+            seconds, since_start = self.first_request
+            lines.append(f"  {'first request':<16}{seconds * 1000:8.1f}ms  (시작 후 {since_start * 1000:.0f}ms에 응답)")
+        if warmups:
+            lines.append("[워밍업 (백그라운드)]")
+            for name, seconds, error, deferred in warmups:
+                lines.append(f"  {name:<16}{seconds * 1000:8.1f}ms"
+                             + (f"  ({'첫 요청 후' if self.settled_by == 'request' else '유휴 시'})" if deferred else "")
+                             + (f"  실패: {error}" if error else ""))
+        return "\n".join(lines)
+
+    def collect(self):
+        """/metrics 수집기"""
+        with self._lock:
+            phases = list(self.phases)
+            warmups = list(self.warmups)
+        first = [({}, round(self.first_request[0], 6))] if self.first_request is not None else []
+        return [
+            ("chatbot_startup_seconds", "gauge", "Time spent in each startup phase before serving requests",
+             [({"phase": phase}, round(seconds, 6)) for phase, seconds in phases]),
+            ("chatbot_first_request_seconds", "gauge", "Latency of the first webhook request after a cold start", first),
+            ("chatbot_warmup_seconds", "gauge", "Time spent in each background warmup task",
+             [({"task": name, "outcome": "error" if error else "ok"}, round(seconds, 6)) for name, seconds, error, _ in warmups]),
+            ("chatbot_warmup_done", "gauge", "1 once all background warmup tasks have finished",
+             [({}, int(self.done.is_set()))]),
+        ]
+
+STARTUP = StartupProfile()
@@ -0,0 +1,276 @@
+import bisect
+import io
+import os
+import threading
+import time
+
+from http_client import http_get
+from metrics import instrument
+
+# 한 줄에 종목 하나: 종목코드\t종목명\t시장\t별칭1,별칭2
+KRX_INDEX_PATH = os.environ.get("KRX_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "krx_stocks.tsv"))
+# 저장소에 함께 두는 주요 종목 목록. 디스크 인덱스가 없을 때(새로 배포한 인스턴스 등) 대신 읽는다
+KRX_SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "krx_stocks_seed.tsv")
+REFRESH_INTERVAL = float(os.environ.get("KRX_INDEX_REFRESH", "86400"))
+# 갱신 실패 후 다시 시도하기까지(초): 인덱스가 비어 있으면 짧게
+RETRY_EMPTY = 10
+RETRY_INTERVAL = 600
+# 시작 직후 디스크 인덱스를 아직 못 읽었을 때 조회가 기다리는 최대 시간(초)
+LOAD_WAIT = float(os.environ.get("KRX_INDEX_WAIT", "2"))
+KIND_URL = "https://kind.krx.co.kr/corpgeneral/corpList.do?method=download&searchType=13&marketType={market}"
+KIND_MARKETS = {"KOSPI": "stockMkt", "KOSDAQ": "kosdaqMkt"}
+
+# 자주 쓰는 줄임말
+DEFAULT_ALIASES = {
+    "삼전": "005930",
+    "하닉": "000660",
+    "하이닉스": "000660",
+    "현차": "005380",
+    "엘지엔솔": "373220",
+    "엘엔솔": "373220",
+    "네이버": "035420",
+    "셀트": "068270",
+    "카뱅": "323410",
+}
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+def normalize(name):
+    return "".join(name.split()).lower()
+
+def choseong(name):
+    """'삼성전자' → 'ㅅㅅㅈㅈ' (한글 외 문자는 그대로)"""
+    out = []
+    for ch in normalize(name):
+        if "가" <= ch <= "힣":
+            out.append(CHOSEONG[(ord(ch) - 0xAC00) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def is_choseong_query(query):
+    return bool(query) and all(ch in CHOSEONG for ch in query)
+
+class IndexSnapshot:
+    """종목코드 목록으로 만든 조회용 인덱스 (생성 후 변경하지 않음)"""
+
+    def __init__(self, records):
+        self.records = records  # 종목코드 → (종목명, 시장, 별칭 튜플)
+        self.by_name = {}
+        self.by_choseong = {}
+        for code, (name, market, aliases) in records.items():
+            self.by_name[normalize(name)] = code
+            self.by_choseong.setdefault(choseong(name), []).append(code)
+        for alias, code in DEFAULT_ALIASES.items():
+            if code in records:
+                self.by_name.setdefault(normalize(alias), code)
+        for code, (name, market, aliases) in records.items():
+            for alias in aliases:
+                self.by_name.setdefault(normalize(alias), code)
+        self.names = sorted(self.by_name)
+        self.choseongs = sorted(self.by_choseong)
+
+class StockIndex:
+    """
+    KOSPI/KOSDAQ 종목명 → 종목코드 로컬 인덱스.
+    디스크의 TSV 파일을 시작 시 읽어 두고, 하루 한 번 KRX 상장목록으로 변경분만 반영해 다시 저장한다.
+    """
+
+    def __init__(self, path=KRX_INDEX_PATH, interval=REFRESH_INTERVAL, seed_path=KRX_SEED_PATH):
+        self.path = path
+        self.seed_path = seed_path
+        # 마지막으로 두 시장을 모두 받은 시각. learn()도 TSV를 다시 쓰므로 파일 mtime 대신 따로 남긴다
+        self.stamp_path = path + ".refreshed"
+        self.refreshed_at = 0.0
+        self.interval = interval
+        self.snapshot = IndexSnapshot({})
+        self._lock = threading.Lock()
+        self._started = False
+        self.loaded = threading.Event()
+
+    def load(self):
+        """디스크 인덱스, 없으면 seed 목록을 읽는다"""
+        try:
+            return self._read(self.path) or bool(self.seed_path and self._read(self.seed_path))
+        finally:
+            self.loaded.set()
+
+    def _read(self, path):
+        records = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) < 3:
+                        continue
+                    aliases = tuple(a for a in parts[3].split(",") if a) if len(parts) > 3 else ()
+                    records[parts[0]] = (parts[1], parts[2], aliases)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"KRX Index Load Error: {e}")
+            return False
+        self.snapshot = IndexSnapshot(records)
+        return True
+
+    def save(self, records):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for code in sorted(records):
+                name, market, aliases = records[code]
+                f.write(f"{code}\t{name}\t{market}\t{','.join(aliases)}\n")
+        os.replace(tmp, self.path)
+
+    def update(self, listings, full=False):
+        """
+        (종목코드, 종목명, 시장) 목록을 반영. full=True면 목록에 없는 종목은 상장폐지로 보고 뺀다.
+        바뀐 종목 수를 반환
+        """
+        # 디스크 인덱스를 읽기 전에 반영하면 일부만 담긴 목록으로 파일을 덮어쓰게 된다
+        self.wait_loaded(None)
+        with self._lock:
+            old = self.snapshot.records
+            records = {} if full else dict(old)
+            changed = 0
+            for code, name, market in listings:
+                prev = old.get(code)
+                aliases = prev[2] if prev else ()
+                records[code] = (name, market, aliases)
+                if not prev or prev[0] != name or prev[1] != market:
+                    changed += 1
+            if full:
+                changed += len(set(old) - set(records))
+            if not changed:
+                return 0
+            self.snapshot = IndexSnapshot(records)
+            try:
+                self.save(records)
+            except Exception as e:
+                print(f"KRX Index Save Error: {e}")
+            return changed
+
+    def learn(self, code, name):
+        """네트워크 검색으로 찾은 종목을 인덱스에 추가"""
+        if code and name and code not in self.snapshot.records:
+            self.update([(code, name, "")])
+
+    def write_stamp(self):
+        try:
+            os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+            with open(self.stamp_path, "w") as f:
+                f.write(f"{self.refreshed_at:.0f}\n")
+        except Exception as e:
+            print(f"KRX Index Save Error: {e}")
+
+    def last_refreshed(self):
+        """마지막 KIND 전체 갱신 시각 (unix 초, 없으면 0)"""
+        try:
+            with open(self.stamp_path) as f:
+                return max(float(f.read().strip() or 0), self.refreshed_at)
+        except (OSError, ValueError):
+            return self.refreshed_at
+
+    def refresh(self):
+        """KIND 목록으로 갱신. 바뀐 종목 수, 두 시장 중 하나라도 못 받았으면 None"""
+        try:
+            listings = []
+            complete = True
+            for market, kind_market in KIND_MARKETS.items():
+                rows = fetch_kind_listings(market, kind_market)
+                complete = complete and bool(rows)
+                listings.extend(rows)
+            # 한 시장이라도 못 받았으면 삭제 없이 추가/변경만 반영
+            changed = self.update(listings, full=complete)
+            if not complete:
+                return None
+            self.refreshed_at = time.time()
+            self.write_stamp()
+            return changed
+        except Exception as e:
+            print(f"KRX Index Refresh Error: {e}")
+            return None
+
+    def start(self, block=True, hold=None):
+        """
+        디스크 인덱스를 읽고, 오래됐으면 백그라운드에서 갱신 (block=False면 읽기도 백그라운드에서).
+        hold(threading.Event)가 있으면 set될 때까지 KIND 갱신을 미룬다
+        """
+        if self._started:
+            return
+        self._started = True
+        if block:
+            self.load()
+        threading.Thread(target=self._loop, args=(not block, hold), name="krx-index", daemon=True).start()
+
+    def wait_loaded(self, timeout=LOAD_WAIT):
+        if self._started and not self.loaded.is_set():
+            self.loaded.wait(timeout)
+
+    def _loop(self, load_first=False, hold=None):
+        if load_first:
+            self.load()
+        if hold is not None:
+            hold.wait()
+        while True:
+            age = time.time() - self.last_refreshed()
+            if age >= self.interval:
+                if self.refresh() is None:
+                    time.sleep(RETRY_INTERVAL if self.snapshot.records else RETRY_EMPTY)
+                    continue
+                age = 0
+            time.sleep(max(self.interval - age, 60))
+
+    def _prefix(self, keys, query):
+        start = bisect.bisect_left(keys, query)
+        found = []
+        for key in keys[start:]:
+            if not key.startswith(query):
+                break
+            found.append(key)
+        return min(found, key=len) if found else None
+
+    def resolve(self, query, guess=True):
+        """
+        정확히 일치(별칭 포함) → 초성 → 앞부분 일치 순으로 (종목코드, 종목명) 반환, 없으면 (None, None)
+        guess=False면 정확히 일치만 본다 (초성/앞부분 일치는 다른 회사일 수 있다)
+        """
+        self.wait_loaded()
+        snapshot = self.snapshot
+        norm = normalize(query)
+        if not norm:
+            return None, None
+        code = snapshot.by_name.get(norm)
+        if not code and not guess:
+            return None, None
+        if not code and is_choseong_query(norm):
+            key = norm if norm in snapshot.by_choseong else self._prefix(snapshot.choseongs, norm)
+            if key:
+                code = min(snapshot.by_choseong[key], key=lambda c: len(snapshot.records[c][0]))
+        if not code:
+            key = self._prefix(snapshot.names, norm)
+            if key:
+                code = snapshot.by_name[key]
+        if not code:
+            return None, None
+        return code, snapshot.records[code][0]
+
+    def is_exact(self, query):
+        """종목명/별칭과 정확히 일치하는지"""
+        return normalize(query) in self.snapshot.by_name
+
+@instrument("krx_kind", error_of=lambda rows: None if rows else "empty")
+def fetch_kind_listings(market, kind_market):
+    """KRX KIND 상장법인목록 → [(종목코드, 종목명, 시장)]"""
+    import pandas as pd
+
+    r = http_get(KIND_URL.format(market=kind_market))
+    if r.status_code != 200:
+        print(f"KRX Index Refresh Error: {market} status {r.status_code}")
+        return []
+    html = r.content.decode("euc-kr", errors="replace")
+    table = pd.read_html(io.StringIO(html), header=0, converters={"종목코드": str})[0]
+    return [(code.strip().zfill(6), str(name).strip(), market)
+            for name, code in zip(table["회사명"], table["종목코드"])]
+
+STOCK_INDEX = StockIndex()
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import websocket  # websocket-client
+except ImportError:
+    websocket = None
+
+UPBIT_WS_URL = os.environ.get("UPBIT_WS_URL", "wss://api.upbit.com/websocket/v1")
+BITHUMB_WS_URL = os.environ.get("BITHUMB_WS_URL", "wss://pubwss.bithumb.com/pub/ws")
+# 이 시간(초)보다 오래된 체결가는 쓰지 않고 REST로 조회
+MAX_AGE = float(os.environ.get("TICKER_STREAM_MAX_AGE", "10"))
+
+class TickerTable:
+    """
+    거래소별 최신 체결가 테이블. 심볼 → (가격, 변동률%, 수신시각) 튜플을 통째로 교체한다.
+    """
+
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self._rows = {}
+        self.updates = 0
+
+    def update(self, symbol, price, change):
+        self._rows[symbol] = (price, change, time.monotonic())
+        self.updates += 1
+
+    def get(self, symbol):
+        """최근 max_age초 안에 받은 (가격, 변동률)이 있으면 반환, 없으면 None"""
+        row = self._rows.get(symbol)
+        if row is None or time.monotonic() - row[2] > self.max_age:
+            return None
+        return row[0], row[1]
+
+    def __len__(self):
+        return len(self._rows)
+
+def upbit_subscribe(symbols):
+    codes = [f"KRW-{s}" for s in symbols]
+    return json.dumps([{"ticket": str(uuid.uuid4())}, {"type": "ticker", "codes": codes}, {"format": "SIMPLE"}])
+
+def upbit_parse(raw):
+    msg = json.loads(raw)
+    code = msg.get("cd") or msg.get("code")
+    if not code or not code.startswith("KRW-"):
+        return []
+    price = msg.get("tp", msg.get("trade_price"))
+    change = msg.get("scr", msg.get("signed_change_rate", 0))
+    if price is None:
+        return []
+    return [(code[4:], float(price), float(change) * 100)]
+
+def bithumb_subscribe(symbols):
+    return json.dumps({"type": "ticker", "symbols": [f"{s}_KRW" for s in symbols], "tickTypes": ["24H"]})
+
+def bithumb_parse(raw):
+    msg = json.loads(raw)
+    if msg.get("type") != "ticker":
+        return []
+    content = msg.get("content", {})
+    symbol = content.get("symbol", "")
+    if not symbol.endswith("_KRW") or content.get("closePrice") is None:
+        return []
+    return [(symbol[:-4], int(float(content["closePrice"])), float(content.get("chgRate", 0)))]
+
+class ExchangeStream:
+    """
+    거래소 WebSocket 시세 구독 스레드. 끊기면 지수 백오프로 다시 접속하고,
+    접속할 때마다 symbols_loader()로 구독 목록을 새로 받는다.
+    """
+
+    def __init__(self, name, url, symbols_loader, subscribe, parse, table=None, on_update=None):
+        self.name = name
+        self.url = url
+        self.symbols_loader = symbols_loader
+        self.subscribe = subscribe
+        self.parse = parse
+        self.table = table or TickerTable()
+        self.on_update = on_update  # on_update(거래소, 심볼, 가격): 체결마다 호출 (시세 기록용)
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if websocket is None:
+            print(f"Ticker Stream Error: websocket-client 미설치, {self.name} 스트림 비활성화")
+            return False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"stream-{self.name}", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                symbols = self.symbols_loader()
+                if not symbols:
+                    self._stop.wait(10)
+                    continue
+                ws = websocket.create_connection(self.url, timeout=30)
+                try:
+                    ws.send(self.subscribe(symbols))
+                    self.connected = True
+                    backoff = 1
+                    while not self._stop.is_set():
+                        raw = ws.recv()
+                        if not raw:
+                            break
+                        for symbol, price, change in self.parse(raw):
+                            self.table.update(symbol, price, change)
+                            if self.on_update:
+                                self.on_update(self.name, symbol, price)
+                finally:
+                    self.connected = False
+                    ws.close()
+            except Exception as e:
+                print(f"Ticker Stream Error ({self.name}): {e}")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+class TickerStreams:
+    """업비트/빗썸 KRW 마켓 실시간 시세 (TICKER_STREAM=1 일 때만 동작)"""
+
+    def __init__(self):
+        self.upbit = None
+        self.bithumb = None
+
+    def start(self, upbit_symbols, bithumb_symbols, upbit_url=UPBIT_WS_URL, bithumb_url=BITHUMB_WS_URL, on_update=None):
+        self.upbit = ExchangeStream("upbit", upbit_url, upbit_symbols, upbit_subscribe, upbit_parse, on_update=on_update)
+        self.bithumb = ExchangeStream("bithumb", bithumb_url, bithumb_symbols, bithumb_subscribe, bithumb_parse, on_update=on_update)
+        self.upbit.start()
+        self.bithumb.start()
+
+    def stop(self):
+        for stream in (self.upbit, self.bithumb):
+            if stream:
+                stream.stop()
+
+    def upbit_price(self, symbol):
+        return self.upbit.table.get(symbol.upper()) if self.upbit else None
+
+    def bithumb_price(self, symbol):
+        return self.bithumb.table.get(symbol.upper()) if self.bithumb else None
+
+TICKER_STREAMS = TickerStreams()
@@ -0,0 +1,166 @@
+import bisect
+import difflib
+import os
+import threading
+
+from http_client import http_get
+from metrics import instrument
+
+UPBIT_MARKET_URL = "https://api.upbit.com/v1/market/all"
+REFRESH_INTERVAL = float(os.environ.get("UPBIT_CATALOG_REFRESH", "600"))
+MARKET_PRIORITY = ("KRW", "BTC")
+# 유사 이름으로 볼 최소 유사도 (difflib 비율)
+FUZZY_CUTOFF = 0.8
+# 시작 직후 첫 목록이 아직 없을 때 조회가 기다리는 최대 시간(초)
+LOAD_WAIT = float(os.environ.get("UPBIT_CATALOG_WAIT", "3"))
+
+def normalize(name):
+    return "".join(name.split()).lower()
+
+class CatalogSnapshot:
+    """
+    한 시점의 업비트 마켓 목록 인덱스 (생성 후 변경하지 않음)
+    index: 한글명/영문명/심볼 → {마켓: 심볼}
+    """
+
+    def __init__(self, markets):
+        self.index = {}
+        self.korean_names = {}
+        self.display_names = {}
+        self.symbols = {quote: [] for quote in MARKET_PRIORITY}
+        for m in markets:
+            quote, _, symbol = m["market"].partition("-")
+            if quote not in MARKET_PRIORITY:
+                continue
+            self.symbols[quote].append(symbol)
+            korean_name = m.get("korean_name") or symbol
+            self.korean_names.setdefault(symbol, korean_name)
+            for key in (korean_name, m.get("english_name"), symbol):
+                if not key:
+                    continue
+                norm = normalize(key)
+                self.index.setdefault(norm, {})[quote] = symbol
+                self.display_names.setdefault(norm, korean_name)
+        self.keys = sorted(self.index)
+        self.hangul_keys = [k for k in self.keys if not k.isascii()]
+
+    def __len__(self):
+        return len(self.korean_names)
+
+class MarketCatalog:
+    """
+    업비트 KRW/BTC 마켓 카탈로그.
+    백그라운드에서 주기적으로 /v1/market/all 을 받아 새 스냅샷으로 통째로 교체하므로
+    조회는 네트워크를 기다리지 않는다.
+    """
+
+    def __init__(self, url=UPBIT_MARKET_URL, interval=REFRESH_INTERVAL):
+        self.url = url
+        self.interval = interval
+        self.snapshot = CatalogSnapshot([])
+        self._started = False
+        self._stop = threading.Event()
+        self.loaded = threading.Event()
+
+    @instrument("upbit_catalog", error_of=lambda ok: None if ok else "refresh failed")
+    def refresh(self):
+        try:
+            r = http_get(self.url)
+            if r.status_code != 200:
+                print(f"Upbit Catalog Error: status {r.status_code}")
+                return False
+            snapshot = CatalogSnapshot(r.json())
+            if not len(snapshot):
+                return False
+            self.snapshot = snapshot
+            return True
+        except Exception as e:
+            print(f"Upbit Catalog Error: {e}")
+            return False
+
+    def start(self, block=True):
+        """
+        첫 목록을 받아두고 이후 주기적 갱신 스레드를 띄운다.
+        block=False면 첫 목록도 갱신 스레드에서 받고, 그 사이 조회는 LOAD_WAIT까지 기다린다
+        """
+        if self._started:
+            return
+        self._started = True
+        if block:
+            self._load()
+        threading.Thread(target=self._loop, args=(not block,), name="upbit-catalog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _load(self):
+        try:
+            self.refresh()
+        finally:
+            self.loaded.set()
+
+    def _loop(self, load_first=False):
+        if load_first:
+            self._load()
+        while not self._stop.wait(self.interval if len(self.snapshot) else 10):
+            self.refresh()
+
+    def wait_loaded(self, timeout=LOAD_WAIT):
+        """시작은 했는데 첫 목록을 아직 못 받았으면 잠시 기다린다 (실패해도 더 기다리지 않음)"""
+        if self._started and not self.loaded.is_set():
+            self.loaded.wait(timeout)
+
+    def lookup(self, name):
+        """한글명/영문명/심볼 정확히 일치 → (심볼, 마켓, 한글명), KRW마켓 우선"""
+        snapshot = self.snapshot
+        norm = normalize(name)
+        markets = snapshot.index.get(norm)
+        if not markets:
+            return None, None, None
+        for quote in MARKET_PRIORITY:
+            if quote in markets:
+                return markets[quote], quote, snapshot.display_names[norm]
+        return None, None, None
+
+    def search_prefix(self, name, limit=5):
+        """앞부분이 일치하는 이름들 (짧은 이름 우선)"""
+        snapshot = self.snapshot
+        norm = normalize(name)
+        if not norm:
+            return []
+        start = bisect.bisect_left(snapshot.keys, norm)
+        found = []
+        for key in snapshot.keys[start:]:
+            if not key.startswith(norm):
+                break
+            found.append(key)
+        found.sort(key=len)
+        return found[:limit]
+
+    def resolve(self, name, fuzzy=True):
+        """
+        정확히 일치 → 앞부분 일치 → 유사 이름 순으로 찾아 (심볼, 마켓, 한글명) 반환
+        영문 입력은 다른 거래소 전용 코인일 수 있어 정확히 일치만 본다.
+        입력보다 짧은 이름은 유사 이름으로 보지 않는다 (비트코인골드 → 비트코인 같은 다른 코인)
+        """
+        self.wait_loaded()
+        symbol, market, korean_name = self.lookup(name)
+        if symbol or not fuzzy or name.isascii():
+            return symbol, market, korean_name
+        for key in self.search_prefix(name, limit=1):
+            return self.lookup(key)
+        norm = normalize(name)
+        for key in difflib.get_close_matches(norm, self.snapshot.hangul_keys, n=3, cutoff=FUZZY_CUTOFF):
+            if len(key) >= len(norm):
+                return self.lookup(key)
+        return None, None, None
+
+    def is_exact(self, name):
+        """resolve 결과가 추정(앞부분/유사 이름)이 아니라 정확히 일치한 것인지"""
+        return normalize(name) in self.snapshot.index
+
+    def krw_symbols(self):
+        self.wait_loaded()
+        return list(self.snapshot.symbols["KRW"])
+
+UPBIT_CATALOG = MarketCatalog()